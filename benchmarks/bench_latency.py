@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Keystroke-to-frame latency of the menus in a full Application
+
+Runs the menus inside a headless prompt_toolkit Application, with pipe
+input and a dummy output, replays scripted keystroke sequences and
+reports the percentiles of the time between sending each key and the
+end of the render that follows it. That includes the key processing
+and the whole render loop around the widget, which the
+microbenchmarks in bench_widget.py leave out.
+
+    python benchmarks/bench_latency.py -o before.json
+    ... change things ...
+    python benchmarks/bench_latency.py --compare before.json
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Callable, Dict, List
+
+from prompt_toolkit.application import Application
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.input.base import PipeInput
+from prompt_toolkit.layout.layout import Layout
+from prompt_toolkit.output import DummyOutput
+
+from ptvertmenu import FuzzFilterVertMenu, FuzzRankVertMenu, VertMenu
+from ptvertmenu.vertmenuuicontrol import Item
+
+from bench_widget import TYPED, Results, add_output_arguments, corpus, save_and_compare
+
+DOWN = "\x1b[B"
+PAGEDOWN = "\x1b[6~"
+BACKSPACE = "\x7f"
+
+MENUS: Dict[str, Callable[[List[Item]], Any]] = {
+    "vertmenu": VertMenu,
+    "fuzzfilter": FuzzFilterVertMenu,
+    "fuzzrank": FuzzRankVertMenu,
+}
+
+
+SCRIPTS: Dict[str, Callable[[], List[str]]] = {
+    "typing": lambda: list(TYPED) + [BACKSPACE] * len(TYPED),
+    "pagedown": lambda: [PAGEDOWN] * 50,
+    "hold_down": lambda: [DOWN] * 200,
+}
+
+# Scripts that don't apply to menus without a search buffer:
+SKIP = {("vertmenu", "typing")}
+
+
+async def replay(
+    app: "Application[None]", pipe: PipeInput, keys: List[str], timeout: float
+) -> List[float]:
+    """Send the keys one at a time and return how long each one took to
+    be rendered"""
+    rendered = asyncio.Event()
+
+    def on_render(_: object) -> None:
+        rendered.set()
+
+    app.after_render += on_render
+    task = asyncio.ensure_future(app.run_async())
+    await asyncio.wait_for(rendered.wait(), timeout)
+    latencies = []
+    for key in keys:
+        rendered.clear()
+        start = time.perf_counter()
+        pipe.send_text(key)
+        await asyncio.wait_for(rendered.wait(), timeout)
+        latencies.append(time.perf_counter() - start)
+    app.exit()
+    await task
+    return latencies
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+
+    def at(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {"p50": at(0.5), "p90": at(0.9), "p99": at(0.99), "max": ordered[-1]}
+
+
+def run_one(menu_name: str, items: List[Item], keys: List[str]) -> List[float]:
+    with create_pipe_input() as pipe:
+        menu = MENUS[menu_name](items)
+        app: "Application[None]" = Application(
+            layout=Layout(menu), input=pipe, output=DummyOutput()
+        )
+        return asyncio.run(replay(app, pipe, keys, timeout=60))
+
+
+def run_all(
+    menus: List[str], scripts: List[str], sizes: List[int], kind: str
+) -> Results:
+    results: Results = {}
+    for size in sizes:
+        items = corpus(size, kind)
+        for menu_name in menus:
+            for script in scripts:
+                if (menu_name, script) in SKIP:
+                    continue
+                key = f"{menu_name}/{script}/{kind}/{size}"
+                result = percentiles(run_one(menu_name, items, SCRIPTS[script]()))
+                results[key] = result
+                print(
+                    f"{key:40}"
+                    + "".join(f" {k} {v * 1000:9.3f} ms" for k, v in result.items())
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=[10000, 100000],
+        help="comma-separated corpus sizes (default: 10000,100000)",
+    )
+    parser.add_argument("--kind", default="plain", help="label kind")
+    parser.add_argument(
+        "--menus",
+        type=lambda s: s.split(","),
+        default=list(MENUS),
+        help="comma-separated menus among " + ",".join(MENUS),
+    )
+    parser.add_argument(
+        "--scripts",
+        type=lambda s: s.split(","),
+        default=list(SCRIPTS),
+        help="comma-separated scripts among " + ",".join(SCRIPTS),
+    )
+    add_output_arguments(parser)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="maximum p50/p90 ratio against the baseline (default: 1.25)",
+    )
+    args = parser.parse_args()
+    results = run_all(args.menus, args.scripts, args.sizes, args.kind)
+    save_and_compare(args, results, {"p50": args.threshold, "p90": args.threshold})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Startup time of the menus, from the import to the first frame
+
+Runs each case in a fresh interpreter, so that nothing is imported
+yet, and reports the best of a few runs of:
+- import: the time it takes to import ptvertmenu;
+- construct: the time it takes to create the menu, once imported;
+- first_frame: the time from the start of the import to the end of the
+  first render of the menu in a headless Application.
+
+    python benchmarks/bench_startup.py -o before.json
+    ... change things ...
+    python benchmarks/bench_startup.py --compare before.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+from bench_widget import Results, add_output_arguments, save_and_compare
+
+MENUS = ["VertMenu", "FuzzFilterVertMenu", "FuzzRankVertMenu"]
+
+# Run in a fresh interpreter with the menu and the corpus size as
+# arguments; prints the timings as JSON:
+CHILD = """
+import json
+import sys
+import time
+
+start = time.perf_counter()
+import ptvertmenu
+imported = time.perf_counter()
+
+import asyncio
+
+from prompt_toolkit.application import Application
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.layout.layout import Layout
+from prompt_toolkit.output import DummyOutput
+
+from bench_widget import corpus
+
+items = corpus(int(sys.argv[2]), "plain")
+setup = time.perf_counter() - imported
+before = time.perf_counter()
+menu = getattr(ptvertmenu, sys.argv[1])(items)
+constructed = time.perf_counter()
+
+
+async def first_frame(app):
+    rendered = asyncio.Event()
+    app.after_render += lambda _: rendered.set()
+    task = asyncio.ensure_future(app.run_async())
+    await rendered.wait()
+    frame = time.perf_counter()
+    app.exit()
+    await task
+    return frame
+
+
+with create_pipe_input() as pipe:
+    app = Application(layout=Layout(menu), input=pipe, output=DummyOutput())
+    frame = asyncio.run(first_frame(app))
+
+print(
+    json.dumps(
+        {
+            "import": imported - start,
+            "construct": constructed - before,
+            # The corpus creation is not part of the startup:
+            "first_frame": frame - start - setup,
+        }
+    )
+)
+"""
+
+
+def run_one(menu: str, size: int) -> Dict[str, float]:
+    env = dict(os.environ)
+    here = os.path.dirname(os.path.abspath(__file__))
+    src = os.path.join(os.path.dirname(here), "src")
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (here, src, env.get("PYTHONPATH")) if p
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, menu, str(size)],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    result: Dict[str, float] = json.loads(output)
+    return result
+
+
+def run_all(menus: List[str], sizes: List[int], repeat: int) -> Results:
+    results: Results = {}
+    for size in sizes:
+        for menu in menus:
+            key = f"{menu}/{size}"
+            runs = [run_one(menu, size) for _ in range(repeat)]
+            result = {name: min(run[name] for run in runs) for name in runs[0]}
+            results[key] = result
+            print(
+                f"{key:30}"
+                + "".join(f" {k} {v * 1000:9.3f} ms" for k, v in result.items())
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=[100, 100000],
+        help="comma-separated corpus sizes (default: 100,100000)",
+    )
+    parser.add_argument(
+        "--menus",
+        type=lambda s: s.split(","),
+        default=MENUS,
+        help="comma-separated menus among " + ",".join(MENUS),
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    add_output_arguments(parser)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="maximum ratio against the baseline (default: 1.25)",
+    )
+    args = parser.parse_args()
+    results = run_all(args.menus, args.sizes, args.repeat)
+    save_and_compare(
+        args,
+        results,
+        {"import": args.threshold, "first_frame": args.threshold},
+        width=30,
+    )
+
+
+if __name__ == "__main__":
+    main()
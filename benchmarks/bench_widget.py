@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""Microbenchmarks of the widget hot paths
+
+Times the line mappings, items assignment, line rendering and the
+filters of the dynamic menus against synthetic corpora, and reports
+the best time and the peak memory of each case. The results can be
+saved as JSON and compared against a previous run:
+
+    python benchmarks/bench_widget.py -o before.json
+    ... change things ...
+    python benchmarks/bench_widget.py --compare before.json
+
+The comparison exits with an error if any case got slower or bigger
+than the given thresholds.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from prompt_toolkit.formatted_text import StyleAndTextTuples
+
+from ptvertmenu.dynvertmenu import (
+    FuzzFilterVertMenu,
+    FuzzRankVertMenu,
+    RegexFilterVertMenu,
+    RegexSearchVertMenu,
+)
+from ptvertmenu.vertmenuuicontrol import Item, VertMenuUIControl
+
+WORDS = [
+    "alpha",
+    "bravo",
+    "charlie",
+    "delta",
+    "echo",
+    "foxtrot",
+    "golf",
+    "hotel",
+    "india",
+    "juliett",
+    "kilo",
+    "lima",
+]
+
+KINDS = ["plain", "multiline", "formatted"]
+
+# What gets typed in the filter cases, one keystroke at a time, and
+# then erased:
+TYPED = "del.ech"
+
+Case = Callable[[List[Item]], Callable[[], object]]
+# Metrics of each case, by case:
+Results = Dict[str, Dict[str, float]]
+
+
+def label(i: int) -> str:
+    return " ".join(WORDS[(i * k) % len(WORDS)] for k in (1, 3, 7)) + f" {i}"
+
+
+def corpus(size: int, kind: str) -> List[Item]:
+    """Return size items with labels of the given kind"""
+    if kind == "plain":
+        return [(label(i), i) for i in range(size)]
+    if kind == "multiline":
+        return [(f"{label(i)}\n  {WORDS[i % len(WORDS)]}", i) for i in range(size)]
+    items: List[Item] = []
+    for i in range(size):
+        text = label(i)
+        head, _, tail = text.partition(" ")
+        formatted: StyleAndTextTuples = [("bold", head), ("", " " + tail)]
+        items.append((formatted, i))
+    return items
+
+
+def keystrokes(text: str) -> Iterator[str]:
+    for i in range(1, len(text) + 1):
+        yield text[:i]
+    for i in range(len(text) - 1, -1, -1):
+        yield text[:i]
+
+
+def case_lineno_mappings(items: List[Item]) -> Callable[[], object]:
+    control = VertMenuUIControl(items)
+
+    def run() -> None:
+        # The mappings are computed when first needed:
+        control._gen_lineno_mappings()
+        control._ensure_mappings()
+
+    return run
+
+
+def case_set_items(items: List[Item]) -> Callable[[], object]:
+    control = VertMenuUIControl(items)
+
+    def run() -> None:
+        control.items = items
+        control._ensure_mappings()
+
+    return run
+
+
+def case_get_line(items: List[Item]) -> Callable[[], object]:
+    control = VertMenuUIControl(items)
+    content = control.create_content(80, 25)
+    step = max(1, content.line_count // 100)
+    linenos = range(0, content.line_count, step)
+
+    def run() -> None:
+        # Drop the cache to measure rendering, not lookups:
+        control._line_cache.clear()
+        for lineno in linenos:
+            content.get_line(lineno)
+
+    return run
+
+
+def case_create_content(items: List[Item]) -> Callable[[], object]:
+    control = VertMenuUIControl(items)
+
+    def run() -> None:
+        content = control.create_content(80, 25)
+        for lineno in range(25):
+            content.get_line(lineno)
+
+    return run
+
+
+def case_menu(cls: Any) -> Case:
+    def case(items: List[Item]) -> Callable[[], object]:
+        menu = cls(items)
+
+        def run() -> None:
+            for text in keystrokes(TYPED):
+                menu.buffer.text = text
+
+        return run
+
+    return case
+
+
+def case_query(cls: Any, query: str) -> Case:
+    def case(items: List[Item]) -> Callable[[], object]:
+        menu = cls(items)
+
+        def run() -> None:
+            # Typed at once, as when pasted, without a previous result
+            # to narrow down:
+            menu.buffer.text = query
+            menu.buffer.text = ""
+            menu._results.clear()
+
+        return run
+
+    return case
+
+
+CASES: Dict[str, Case] = {
+    "lineno_mappings": case_lineno_mappings,
+    "set_items": case_set_items,
+    "get_line": case_get_line,
+    "create_content": case_create_content,
+    "regex_filter": case_menu(RegexFilterVertMenu),
+    "regex_filter_trigram": case_menu(partial(RegexFilterVertMenu, trigram_index=True)),
+    "fuzzy_filter": case_menu(FuzzFilterVertMenu),
+    "fuzzy_rank": case_menu(FuzzRankVertMenu),
+    "regex_search": case_menu(RegexSearchVertMenu),
+    "regex_query": case_query(RegexFilterVertMenu, "lima.* 42"),
+    "regex_query_trigram": case_query(
+        partial(RegexFilterVertMenu, trigram_index=True), "lima.* 42"
+    ),
+}
+
+
+def measure(run: Callable[[], object], repeat: int) -> Tuple[float, int]:
+    """Return the best time of repeat runs and the peak memory
+    allocated by one extra, traced run"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_all(
+    cases: List[str], sizes: List[int], kinds: List[str], repeat: int
+) -> Results:
+    results: Results = {}
+    for size in sizes:
+        for kind in kinds:
+            items = corpus(size, kind)
+            for name in cases:
+                key = f"{name}/{kind}/{size}"
+                run = CASES[name](items)
+                seconds, peak = measure(run, repeat)
+                results[key] = {"time": seconds, "peak": peak}
+                print(f"{key:40} {seconds * 1000:12.3f} ms {peak / 1024:12.1f} KiB")
+    return results
+
+
+def compare(
+    results: Results,
+    baseline: Results,
+    thresholds: Dict[str, float],
+    width: int = 40,
+) -> List[str]:
+    """Return the cases with a metric whose ratio against the baseline
+    is beyond its threshold"""
+    regressions = []
+    for key, result in sorted(results.items()):
+        if key not in baseline:
+            continue
+        ratios = {
+            name: result[name] / max(baseline[key][name], 1e-9) for name in thresholds
+        }
+        flag = ""
+        if any(ratios[name] > thresholds[name] for name in thresholds):
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(
+            f"{key:{width}}"
+            + "".join(f" {name} x{ratio:6.2f}" for name, ratio in ratios.items())
+            + flag
+        )
+    return regressions
+
+
+def add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("-o", "--output", help="write the results to this file")
+    parser.add_argument("--compare", help="compare with the results in this file")
+
+
+def save_and_compare(
+    args: argparse.Namespace,
+    results: Results,
+    thresholds: Dict[str, float],
+    width: int = 40,
+) -> None:
+    """Save the results to args.output and compare them with the ones in
+    args.compare, exiting with an error if any case regressed"""
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fd:
+            json.dump(
+                {"python": platform.python_version(), "results": results},
+                fd,
+                indent=2,
+            )
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fd:
+            baseline = json.load(fd)["results"]
+        print()
+        regressions = compare(results, baseline, thresholds, width)
+        if regressions:
+            sys.exit(f"{len(regressions)} regression(s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=[10000, 100000],
+        help="comma-separated corpus sizes (default: 10000,100000)",
+    )
+    parser.add_argument(
+        "--kinds",
+        type=lambda s: s.split(","),
+        default=KINDS,
+        help="comma-separated label kinds among " + ",".join(KINDS),
+    )
+    parser.add_argument(
+        "--cases",
+        type=lambda s: s.split(","),
+        default=list(CASES),
+        help="comma-separated cases among " + ",".join(CASES),
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    add_output_arguments(parser)
+    parser.add_argument(
+        "--time-threshold",
+        type=float,
+        default=1.25,
+        help="maximum time ratio against the baseline (default: 1.25)",
+    )
+    parser.add_argument(
+        "--memory-threshold",
+        type=float,
+        default=1.25,
+        help="maximum peak memory ratio against the baseline (default: 1.25)",
+    )
+    args = parser.parse_args()
+    results = run_all(args.cases, args.sizes, args.kinds, args.repeat)
+    save_and_compare(
+        args, results, {"time": args.time_threshold, "peak": args.memory_threshold}
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,69 @@
 """Vertical menu widget for prompt-toolkit with optional fzf-inspired search"""
 
-import importlib.metadata
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-from .dynvertmenu import (
-    FuzzFilterVertMenu,
-    FuzzSearchVertMenu,
-    RegexFilterVertMenu,
-    RegexSearchVertMenu,
-)
-from .vertmenu import Item, VertMenu
+if TYPE_CHECKING:
+    from .dynvertmenu import (
+        FuzzFilterVertMenu,
+        FuzzRankVertMenu,
+        FuzzSearchVertMenu,
+        RegexFilterVertMenu,
+        RegexSearchVertMenu,
+    )
+    from .itemstream import ThreadedItems
+    from .preview import PreviewPane
+    from .stats import Stats
+    from .treevertmenu import TreeVertMenu
+    from .vertmenu import Item, VertMenu
+
+# Module of each attribute, imported when the attribute is first used,
+# so that importing the package doesn't pull in everything:
+_LAZY = {
+    "VertMenu": "vertmenu",
+    "FuzzFilterVertMenu": "dynvertmenu",
+    "FuzzRankVertMenu": "dynvertmenu",
+    "RegexFilterVertMenu": "dynvertmenu",
+    "FuzzSearchVertMenu": "dynvertmenu",
+    "RegexSearchVertMenu": "dynvertmenu",
+    "Item": "vertmenu",
+    "PreviewPane": "preview",
+    "Stats": "stats",
+    "ThreadedItems": "itemstream",
+    "TreeVertMenu": "treevertmenu",
+}
 
 
 def version() -> str:
+    import importlib.metadata
+
     return importlib.metadata.version("ptvertmenu")
 
 
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY))
+
+
 __all__ = [
     "version",
     "VertMenu",
     "FuzzFilterVertMenu",
+    "FuzzRankVertMenu",
     "RegexFilterVertMenu",
     "FuzzSearchVertMenu",
     "RegexSearchVertMenu",
     "Item",
+    "PreviewPane",
+    "Stats",
+    "ThreadedItems",
+    "TreeVertMenu",
 ]
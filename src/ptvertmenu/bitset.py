@@ -0,0 +1,136 @@
+"""Compact set of item positions"""
+
+import re
+from typing import Iterable, Iterator, Sequence
+
+# Number of bits set in each byte value:
+POPCOUNT = bytes(bin(i).count("1") for i in range(256))
+# Bulk operations on ranges at least this long work on the whole set as
+# an int instead of bit by bit:
+RANGE_THRESHOLD = 64
+
+NONZERO = re.compile(b"[^\x00]")
+
+
+class Bitset:
+    """Set of non-negative integers, kept as one bit each
+
+    Made for the positions of the items of a menu: a million positions
+    take 125KB, and the bulk operations on ranges work on whole bytes.
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, positions: Iterable[int] = ()):
+        self.bits = bytearray()
+        self.update(positions if isinstance(positions, Sequence) else list(positions))
+
+    def _grow(self, size: int) -> None:
+        # Make room for positions below size:
+        missing = (size + 7) // 8 - len(self.bits)
+        if missing > 0:
+            self.bits.extend(bytes(missing))
+
+    def __contains__(self, position: object) -> bool:
+        if not isinstance(position, int):
+            return False
+        byte = position >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] >> (position & 7) & 1)
+
+    def add(self, position: int) -> None:
+        self._grow(position + 1)
+        self.bits[position >> 3] |= 1 << (position & 7)
+
+    def discard(self, position: int) -> None:
+        byte = position >> 3
+        if byte < len(self.bits):
+            self.bits[byte] &= ~(1 << (position & 7)) & 0xFF
+
+    def toggle(self, position: int) -> None:
+        self._grow(position + 1)
+        self.bits[position >> 3] ^= 1 << (position & 7)
+
+    def _range_mask(self, positions: Sequence[int]) -> int:
+        """Return the positions of a long step-1 range as an int mask,
+        or 0 if they are something else"""
+        if (
+            isinstance(positions, range)
+            and positions.step == 1
+            and len(positions) >= RANGE_THRESHOLD
+        ):
+            self._grow(positions.stop)
+            return ((1 << len(positions)) - 1) << positions.start
+        return 0
+
+    def _bits_for(self, positions: Sequence[int]) -> bytearray:
+        """Return the bits, with room for all positions"""
+        self._grow(max(positions, default=-1) + 1)
+        return self.bits
+
+    def _to_int(self) -> int:
+        return int.from_bytes(self.bits, "little")
+
+    def _from_int(self, value: int) -> None:
+        self.bits[:] = value.to_bytes(len(self.bits), "little")
+
+    def update(self, positions: Sequence[int]) -> None:
+        mask = self._range_mask(positions)
+        if mask:
+            self._from_int(self._to_int() | mask)
+            return
+        bits = self._bits_for(positions)
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def difference_update(self, positions: Sequence[int]) -> None:
+        mask = self._range_mask(positions)
+        if mask:
+            self._from_int(self._to_int() & ~mask)
+            return
+        bits = self._bits_for(positions)
+        for position in positions:
+            bits[position >> 3] &= ~(1 << (position & 7)) & 0xFF
+
+    def symmetric_difference_update(self, positions: Sequence[int]) -> None:
+        mask = self._range_mask(positions)
+        if mask:
+            self._from_int(self._to_int() ^ mask)
+            return
+        bits = self._bits_for(positions)
+        for position in positions:
+            bits[position >> 3] ^= 1 << (position & 7)
+
+    def splice(self, start: int, stop: int, count: int) -> None:
+        """Replace the positions from start to stop with count unset
+        ones, moving the positions after them"""
+        size = len(self.bits) * 8
+        value = self._to_int()
+        low = value & ((1 << start) - 1)
+        high = value >> stop << (start + count)
+        result = low | high
+        length = max(size - stop + start + count, result.bit_length())
+        self.bits = bytearray(result.to_bytes((length + 7) // 8, "little"))
+
+    def clear(self) -> None:
+        self.bits.clear()
+
+    def copy(self) -> "Bitset":
+        result = Bitset()
+        result.bits = bytearray(self.bits)
+        return result
+
+    def __len__(self) -> int:
+        return sum(self.bits.translate(POPCOUNT))
+
+    def __bool__(self) -> bool:
+        return self.bits.count(0) != len(self.bits)
+
+    def __iter__(self) -> Iterator[int]:
+        # Skip the empty bytes without looking at each one:
+        bits = self.bits
+        for match in NONZERO.finditer(bits):
+            byte = match.start()
+            value = bits[byte]
+            for bit in range(8):
+                if value >> bit & 1:
+                    yield byte * 8 + bit
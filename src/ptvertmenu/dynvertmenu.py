@@ -1,54 +1,402 @@
 """Dyanmic vertical menu"""
 
+import asyncio
 import re
-from typing import Callable, Iterable, Optional
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from typing import (
+    Callable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
 
+from prompt_toolkit.application import get_app
 from prompt_toolkit.buffer import Buffer
-from prompt_toolkit.formatted_text import to_plain_text
+from prompt_toolkit.formatted_text import StyleAndTextTuples
+from prompt_toolkit.key_binding import KeyBindings, KeyBindingsBase, merge_key_bindings
 from prompt_toolkit.key_binding.key_processor import KeyPressEvent
 from prompt_toolkit.layout.containers import Container, HSplit, VSplit, Window
-from prompt_toolkit.layout.controls import BufferControl
+from prompt_toolkit.layout.controls import BufferControl, FormattedTextControl
 
+from .fuzzy import fuzzy_matcher, fuzzy_rank, fuzzy_score
+from .itemstore import ItemStore, ItemView, ReadOnlyItems, item_sequence
+from .itemstream import ItemSource, ItemStream, is_stream
+from .labelstore import LabelStore
+from .parallel import Matcher, MatcherFactory, ParallelFilter
+from .stats import Stats, measure
+from .trigram import TrigramIndex
 from .vertmenu import Item, VertMenu
+from .vertmenuuicontrol import SelectedHandler
 
 E = KeyPressEvent
 
+Indices = Sequence[int]
+Query = Tuple[str, Matcher, Sequence[str]]
+
+
+class FilterResult(NamedTuple):
+    query: str
+    matcher: Matcher
+    labels: Sequence[str]
+    indices: List[int]
+
+
+# Characters that can change the meaning of what comes before them in a
+# regex; appending anything else can only narrow the set of matches:
+REGEX_METACHARS = frozenset("\\.^$*+?{}[]|()")
+
+
+def regex_matcher(query: str) -> Optional[Matcher]:
+    try:
+        return re.compile(query).search
+    except re.error:
+        return None
+
+
+def regex_positions(query: str, text: str) -> Optional[Sequence[int]]:
+    """Positions of the first match of the regex query in text"""
+    try:
+        match = re.search(query, text)
+    except re.error:
+        return None
+    if match is None:
+        return None
+    return range(match.start(), match.end())
+
+
+def fuzzy_positions(query: str, text: str, folded: str) -> Optional[Sequence[int]]:
+    """Positions in text of the fuzzy match of the casefolded query"""
+    if len(text) != len(folded):
+        # Casefolding changed the positions
+        return None
+    result = fuzzy_score(query, text, folded)
+    if result is None:
+        return None
+    return result[1]
+
 
 class DynVertMenuBase:
+    # Creates the matcher of a query key in the parallel filter workers:
+    _matcher_factory: MatcherFactory = staticmethod(regex_matcher)
+    # Maximum number of (query, item) match positions in the cache:
+    highlight_cache_size = 1000
+
     def __init__(
         self,
-        items: Iterable[Item],
+        items: ItemSource,
         selected_item: Optional[Item] = None,
-        selected_handler: Optional[
-            Callable[[Optional[Item], Optional[int]], None]
-        ] = None,
+        selected_handler: Optional[SelectedHandler] = None,
         accept_handler: Optional[Callable[[Item], None]] = None,
         menu_max_width: Optional[int] = None,
+        *,
+        async_filter: bool = False,
+        debounce: float = 0.05,
+        chunk_size: int = 10000,
+        parallel: Optional[ParallelFilter] = None,
+        stats: Optional[Stats] = None,
+        handler_delay: Optional[float] = None,
+        multiselect: bool = False,
+        accept_marked_handler: Optional[Callable[[Sequence[Item]], None]] = None,
     ):
-        self._all_items = tuple(items)
+        self.async_filter = async_filter
+        self.debounce = debounce
+        self.chunk_size = chunk_size
+        self.parallel = parallel
+        self.stats = stats
+        self._generation = 0
+        # Query whose matches are highlighted, and the LRU with the
+        # positions of the matches of the rendered items:
+        self._highlighted = ""
+        self._positions_cache: OrderedDict[Tuple[str, int], Optional[Sequence[int]]] = (
+            OrderedDict()
+        )
+        self._filter_task: Optional[asyncio.Task[None]] = None
+        self._status = ""
+        stream = is_stream(items)
+        self._all_items = item_sequence([] if stream else cast(Iterable[Item], items))
+        self._labels = LabelStore(self._all_items)
+        self._index_labels(0)
+        # Stack of the results of the queries typed so far, each query
+        # extending the one below it:
+        self._results: List[FilterResult] = []
+        # The inner menu shows a view of the items at the indices of
+        # the current result:
         self._vertmenu = VertMenu(
-            self._all_items,
-            selected_item,
+            ItemView(self._all_items, range(len(self._all_items))),
+            None if stream else selected_item,
             selected_handler,
             accept_handler,
             focusable=False,
             max_width=menu_max_width,
+            stats=stats,
+            handler_delay=handler_delay,
+            multiselect=multiselect,
+            accept_marked_handler=accept_marked_handler,
         )
         self.buffer = Buffer(multiline=False, on_text_changed=self.on_change)
         self.control = BufferControl(
-            buffer=self.buffer, key_bindings=self._vertmenu._init_key_bindings()
+            buffer=self.buffer, key_bindings=self._init_key_bindings()
         )
         self.window = HSplit(
             [
-                VSplit([Window(width=1, char=">", height=1), Window(self.control)]),
+                VSplit(
+                    [
+                        Window(width=1, char=">", height=1),
+                        Window(self.control),
+                        Window(
+                            FormattedTextControl(self._get_status),
+                            height=1,
+                            dont_extend_width=True,
+                            style="class:vertmenu.status",
+                        ),
+                    ]
+                ),
                 self._vertmenu,
             ]
         )
         self._vertmenu.focus_window = self.window
+        self._vertmenu.control.highlighter = self._highlight
+        self._stream: Optional[ItemStream] = None
+        if stream:
+            self._vertmenu.control._pending_item = selected_item
+            self._stream = ItemStream(items, self._append_items)
+            self._vertmenu.control.stream = self._stream
+            self._stream.start()
+
+    def _init_key_bindings(self) -> KeyBindingsBase:
+        return self._vertmenu._init_key_bindings()
 
     def on_change(self, buf: Buffer) -> None:
+        query = self._query(buf.document.text)
+        if query is None:
+            return
+        if self.async_filter:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            else:
+                self._generation += 1
+                if self._filter_task is not None:
+                    self._filter_task.cancel()
+                self._filter_task = loop.create_task(
+                    self._filter_async(self._generation, *query)
+                )
+                return
+        with measure(self.stats, "filter"):
+            indices = self._postprocess(query[0], self._filter(*query))
+        self._publish(query[0], indices)
+
+    def _query(self, text: str) -> Optional[Query]:
+        """Return the query key, the matcher and the labels it should
+        be applied to, or None if text is not a valid query"""
         raise NotImplementedError
 
+    def _index_labels(self, start: int) -> None:
+        """Index the labels from start onwards, after they are set or
+        extended"""
+
+    def _postprocess(self, query: str, indices: Indices) -> Indices:
+        """Transform the matches before they are published (may run in
+        an executor)"""
+        return indices
+
+    def _publish(self, query: str, indices: Indices) -> None:
+        self._highlighted = query
+        self._set_filtered(indices)
+
+    def _positions(self, query: str, index: int) -> Optional[Sequence[int]]:
+        """Return the positions of the plain label of the item at index
+        that match query, to be highlighted"""
+        return None
+
+    def _highlight(self, index: int) -> Optional[Sequence[int]]:
+        # Called by the inner menu only for the items it renders
+        query = self._highlighted
+        shown = self._shown
+        if not query or shown is None:
+            return None
+        key = (query, shown[index])
+        cache = self._positions_cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        positions = cache[key] = self._positions(*key)
+        if len(cache) > self.highlight_cache_size:
+            cache.popitem(last=False)
+        return positions
+
+    def _narrows(self, previous: str, query: str) -> bool:
+        """Check if the matches of query are a subset of the matches
+        of previous, which query extends"""
+        suffix = query[len(previous) :]
+        if REGEX_METACHARS.intersection(suffix):
+            return False
+        # Digits can extend a trailing numeric escape, as in \0 -> \01:
+        return "\\" not in previous or not any(c.isdigit() for c in suffix)
+
+    def _candidates(
+        self, query: str, labels: Sequence[str]
+    ) -> Tuple[Optional[Indices], Sequence[int]]:
+        """Return the cached result of query, if there is one, and the
+        indices of the labels that have to be tested otherwise
+
+        When query extends a previous one, only the items that matched
+        that have to be tested again; going back to a previous query
+        reuses its result."""
+        results = self._results
+        while results and not query.startswith(results[-1].query):
+            results.pop()
+        if results and results[-1].query == query:
+            return results[-1].indices, ()
+        if results and self._narrows(results[-1].query, query):
+            return None, results[-1].indices
+        return None, range(len(labels))
+
+    def _filter(self, query: str, matcher: Matcher, labels: Sequence[str]) -> Indices:
+        """Return the indices of the labels that match query"""
+        cached, candidates = self._candidates(query, labels)
+        if cached is not None:
+            return cached
+        indices = self._match(query, matcher, labels, candidates)
+        self._results.append(FilterResult(query, matcher, labels, indices))
+        return indices
+
+    def _match(
+        self,
+        query: str,
+        matcher: Matcher,
+        labels: Sequence[str],
+        candidates: Sequence[int],
+    ) -> List[int]:
+        if self.parallel is not None:
+            found = self.parallel.filter(
+                self._matcher_factory, query, labels, candidates
+            )
+            if found is not None:
+                return found
+        return [i for i in candidates if matcher(labels[i])]
+
+    async def _filter_async(
+        self, generation: int, query: str, matcher: Matcher, labels: Sequence[str]
+    ) -> None:
+        """Filter in chunks in an executor, after a debounce period
+
+        Any new input cancels this task and bumps the generation, so
+        stale results are never published."""
+        await asyncio.sleep(self.debounce)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        indices, candidates = self._candidates(query, labels)
+        if indices is None:
+            found: List[int] = []
+            chunk_size = self.chunk_size
+            if self.parallel is not None and len(candidates) >= self.parallel.threshold:
+                # The worker processes get all candidates at once:
+                chunk_size = len(candidates)
+            for start in range(0, len(candidates), chunk_size):
+                self._set_status(f"filtering… {start}/{len(candidates)}")
+                chunk = candidates[start : start + chunk_size]
+                found.extend(
+                    await loop.run_in_executor(
+                        None, self._match, query, matcher, labels, chunk
+                    )
+                )
+                if generation != self._generation:
+                    return
+            indices = found
+            self._results.append(FilterResult(query, matcher, labels, indices))
+        result = await loop.run_in_executor(None, self._postprocess, query, indices)
+        if generation != self._generation:
+            return
+        if self.stats is not None:
+            self.stats.record("filter", loop.time() - started)
+        self._publish(query, result)
+        self._set_status(f"{len(indices)} matches")
+
+    def _append_items(self, items: Sequence[Item]) -> None:
+        """Add streamed items, applying the active filter to them"""
+        all_items = self._all_items
+        # Streams start from an empty list:
+        assert isinstance(all_items, (list, ItemStore))
+        start = len(all_items)
+        all_items.extend(items)
+        self._labels.extend(items)
+        self._index_labels(start)
+        new: Indices = range(start, len(self._all_items))
+        previous: Optional[FilterResult] = None
+        matches: Indices = new
+        for result in self._results:
+            if previous is None or not self._narrows(previous.query, result.query):
+                matches = new
+            matches = [i for i in matches if result.matcher(result.labels[i])]
+            result.indices.extend(matches)
+            previous = result
+        if self._filter_task is not None and not self._filter_task.done():
+            # Restart the pending filter so that it sees the new items:
+            self.on_change(self.buffer)
+            return
+        self._append_matches(matches)
+        if self._status.endswith(" matches"):
+            self._set_status(f"{len(self._vertmenu.control._items)} matches")
+
+    @property
+    def _shown(self) -> Optional[Indices]:
+        """Indices of the items shown by the inner menu, None if they
+        are not a view of the current items"""
+        shown = self._vertmenu.control._items
+        if isinstance(shown, ItemView) and shown.base is self._all_items:
+            return shown.indices
+        return None
+
+    def _append_matches(self, indices: Indices) -> None:
+        """Publish the streamed items that match the current query"""
+        self._vertmenu.control.append_items(
+            ItemView(self._all_items, indices),
+            [self._labels.lines[i] for i in indices],
+            [self._labels.widths[i] for i in indices],
+        )
+
+    def _get_status(self) -> StyleAndTextTuples:
+        if not self._status:
+            return []
+        return [("", f" {self._status}")]
+
+    def _set_status(self, status: str) -> None:
+        if status == self._status:
+            return
+        self._status = status
+        get_app().invalidate()
+
+    def _set_filtered(self, indices: Indices) -> None:
+        control = self._vertmenu.control
+        # Find the selected item in the new indices, which are usually
+        # sorted, instead of having the control look it up:
+        selected = None
+        if control.selected is not None and self._shown is not None:
+            selected = self._index_in(indices, self._shown[control.selected])
+            if selected is None:
+                selected = 0
+        control.set_items(
+            ItemView(self._all_items, indices),
+            selected,
+            [self._labels.lines[i] for i in indices],
+            [self._labels.widths[i] for i in indices],
+        )
+
+    def _index_in(self, indices: Indices, index: int) -> Optional[int]:
+        """Return the position of index in the sorted indices, None if
+        it's not there"""
+        position = bisect_left(indices, index)
+        if position < len(indices) and indices[position] == index:
+            return position
+        return None
+
     def handle_selected(self) -> None:
         self._vertmenu.handle_selected()
 
@@ -56,14 +404,30 @@ class DynVertMenuBase:
         self._vertmenu.handle_accept()
 
     @property
-    def items(self) -> tuple[Item, ...]:
-        return self._all_items
+    def items(self) -> Sequence[Item]:
+        return ReadOnlyItems(self._all_items)
 
     @items.setter
     def items(self, items: Iterable[Item]) -> None:
-        self._all_items = tuple(items)
+        if self._stream is not None:
+            self._stream.cancel()
+            self._stream = None
+            self._vertmenu.control.stream = None
+        # The inner menu has to look up the selected item in the new
+        # ones, as its view is not of them:
+        self._all_items = item_sequence(items)
+        self._positions_cache.clear()
+        self._labels = LabelStore(self._all_items)
+        self._index_labels(0)
+        self._results.clear()
         self.on_change(self.buffer)
 
+    @property
+    def shown_items(self) -> Sequence[Item]:
+        """The items shown by the menu, after filtering, which the
+        selected index refers to"""
+        return self._vertmenu.control._items
+
     @property
     def selected(self) -> Optional[int]:
         return self._vertmenu.selected
@@ -81,13 +445,11 @@ class DynVertMenuBase:
         self._vertmenu.selected_item = item
 
     @property
-    def selected_handler(self) -> Optional[Callable[[Optional[Item], int], None]]:
+    def selected_handler(self) -> Optional[SelectedHandler]:
         return self._vertmenu.selected_handler
 
     @selected_handler.setter
-    def selected_handler(
-        self, selected_handler: Optional[Callable[[Optional[Item], int], None]]
-    ) -> None:
+    def selected_handler(self, selected_handler: Optional[SelectedHandler]) -> None:
         self._vertmenu.selected_handler = selected_handler
 
     @property
@@ -98,61 +460,373 @@ class DynVertMenuBase:
     def accept_handler(self, accept_handler: Optional[Callable[[Item], None]]) -> None:
         self._vertmenu.accept_handler = accept_handler
 
+    @property
+    def accept_marked_handler(self) -> Optional[Callable[[Sequence[Item]], None]]:
+        return self._vertmenu.accept_marked_handler
+
+    @accept_marked_handler.setter
+    def accept_marked_handler(
+        self, accept_marked_handler: Optional[Callable[[Sequence[Item]], None]]
+    ) -> None:
+        self._vertmenu.accept_marked_handler = accept_marked_handler
+
+    @property
+    def multiselect(self) -> bool:
+        return self._vertmenu.multiselect
+
+    @multiselect.setter
+    def multiselect(self, multiselect: bool) -> None:
+        self._vertmenu.multiselect = multiselect
+
+    @property
+    def marked_items(self) -> Sequence[Item]:
+        """The marked items, including the ones filtered out"""
+        return self._vertmenu.marked_items
+
+    @property
+    def accepted_items(self) -> Sequence[Item]:
+        return self._vertmenu.accepted_items
+
     def __pt_container__(self) -> Container:
         return self.window
 
 
-class RegexFilterVertMenu(DynVertMenuBase):
-    def on_change(self, buf: Buffer) -> None:
-        regex_str = buf.document.text
-        try:
-            regex = re.compile(regex_str)
-        except re.error:
-            return
-        filtered_items = tuple(
-            (item for item in self._all_items if regex.search(to_plain_text(item[0])))
-        )
-        self._vertmenu.control.items = filtered_items
+class RegexQueryMixin(DynVertMenuBase):
+    """Regex queries, shared by the regex filter and search menus"""
 
+    def _query(self, text: str) -> Optional[Query]:
+        matcher = regex_matcher(text)
+        if matcher is None:
+            return None
+        return text, matcher, self._labels.plain
 
-class FuzzFilterVertMenu(DynVertMenuBase):
-    def on_change(self, buf: Buffer) -> None:
-        text = buf.document.text
-        regex_str = ".*".join(text)
-        try:
-            regex = re.compile(regex_str, re.IGNORECASE)
-        except re.error:
+    def _positions(self, query: str, index: int) -> Optional[Sequence[int]]:
+        return regex_positions(query, self._labels.plain[index])
+
+
+class FuzzQueryMixin(DynVertMenuBase):
+    """Fuzzy queries, shared by the fuzzy filter and search menus"""
+
+    _matcher_factory = staticmethod(fuzzy_matcher)
+
+    def _narrows(self, previous: str, query: str) -> bool:
+        # Any subsequence of query is also a subsequence of previous
+        return True
+
+    def _query(self, text: str) -> Optional[Query]:
+        text = text.casefold()
+        return text, fuzzy_matcher(text), self._labels.folded
+
+    def _positions(self, query: str, index: int) -> Optional[Sequence[int]]:
+        labels = self._labels
+        return fuzzy_positions(query, labels.plain[index], labels.folded[index])
+
+
+class RegexFilterVertMenu(RegexQueryMixin, DynVertMenuBase):
+    """Regex filter
+
+    With trigram_index, the labels are indexed by trigram when the items
+    are set, and only the labels that have the literal parts of the
+    regex are tested.
+    """
+
+    def __init__(
+        self,
+        items: ItemSource,
+        selected_item: Optional[Item] = None,
+        selected_handler: Optional[SelectedHandler] = None,
+        accept_handler: Optional[Callable[[Item], None]] = None,
+        menu_max_width: Optional[int] = None,
+        *,
+        async_filter: bool = False,
+        debounce: float = 0.05,
+        chunk_size: int = 10000,
+        parallel: Optional[ParallelFilter] = None,
+        stats: Optional[Stats] = None,
+        handler_delay: Optional[float] = None,
+        trigram_index: bool = False,
+        multiselect: bool = False,
+        accept_marked_handler: Optional[Callable[[Sequence[Item]], None]] = None,
+    ):
+        self.trigram_index = trigram_index
+        self._trigrams: Optional[TrigramIndex] = None
+        super().__init__(
+            items,
+            selected_item,
+            selected_handler,
+            accept_handler,
+            menu_max_width,
+            async_filter=async_filter,
+            debounce=debounce,
+            chunk_size=chunk_size,
+            parallel=parallel,
+            stats=stats,
+            handler_delay=handler_delay,
+            multiselect=multiselect,
+            accept_marked_handler=accept_marked_handler,
+        )
+
+    def _index_labels(self, start: int) -> None:
+        if not self.trigram_index:
             return
-        filtered_items = tuple(
-            (item for item in self._all_items if regex.search(to_plain_text(item[0])))
+        if start == 0 or self._trigrams is None:
+            self._trigrams = TrigramIndex(self._labels.plain)
+        else:
+            self._trigrams.extend(self._labels.plain, start)
+
+    def _candidates(
+        self, query: str, labels: Sequence[str]
+    ) -> Tuple[Optional[Indices], Sequence[int]]:
+        cached, candidates = super()._candidates(query, labels)
+        if cached is not None or self._trigrams is None:
+            return cached, candidates
+        found = self._trigrams.candidates(query)
+        if found is None or len(found) >= len(candidates):
+            return cached, candidates
+        if len(candidates) == len(labels):
+            return None, found
+        # Keep only the items of the previous result that the index
+        # doesn't rule out:
+        keep = set(found)
+        return None, [i for i in candidates if i in keep]
+
+
+class FuzzFilterVertMenu(FuzzQueryMixin, DynVertMenuBase):
+    pass
+
+
+class FuzzRankVertMenu(FuzzFilterVertMenu):
+    """Fuzzy filter that sorts the matches by score, best first
+
+    With limit, only the best limit matches are shown.
+    """
+
+    def __init__(
+        self,
+        items: ItemSource,
+        selected_item: Optional[Item] = None,
+        selected_handler: Optional[SelectedHandler] = None,
+        accept_handler: Optional[Callable[[Item], None]] = None,
+        menu_max_width: Optional[int] = None,
+        *,
+        async_filter: bool = False,
+        debounce: float = 0.05,
+        chunk_size: int = 10000,
+        parallel: Optional[ParallelFilter] = None,
+        limit: Optional[int] = None,
+        stats: Optional[Stats] = None,
+        handler_delay: Optional[float] = None,
+        multiselect: bool = False,
+        accept_marked_handler: Optional[Callable[[Sequence[Item]], None]] = None,
+    ):
+        self.limit = limit
+        super().__init__(
+            items,
+            selected_item,
+            selected_handler,
+            accept_handler,
+            menu_max_width,
+            async_filter=async_filter,
+            debounce=debounce,
+            chunk_size=chunk_size,
+            parallel=parallel,
+            stats=stats,
+            handler_delay=handler_delay,
+            multiselect=multiselect,
+            accept_marked_handler=accept_marked_handler,
+        )
+
+    def _postprocess(self, query: str, indices: Indices) -> Indices:
+        if not query:
+            return indices
+        return tuple(
+            fuzzy_rank(
+                query, indices, self._labels.plain, self._labels.folded, self.limit
+            )
         )
-        self._vertmenu.control.items = filtered_items
 
+    def _publish(self, query: str, indices: Indices) -> None:
+        # Streamed items are ranked again with the same query, keeping
+        # the selection; a new query starts from the best match:
+        changed = query != self._highlighted
+        super()._publish(query, indices)
+        if changed:
+            self._vertmenu.control.go_first()
 
-class RegexSearchVertMenu(DynVertMenuBase):
-    def on_change(self, buf: Buffer) -> None:
-        regex_str = buf.document.text
+    def _index_in(self, indices: Indices, index: int) -> Optional[int]:
+        if not self._highlighted:
+            return super()._index_in(indices, index)
+        # Ranked indices are not sorted:
         try:
-            regex = re.compile(regex_str)
-        except re.error:
-            return
-        item = next(
-            (item for item in self._all_items if regex.search(to_plain_text(item[0])))
-        )
-        if item:
-            self._vertmenu.control.selected_item = item
+            return indices.index(index)
+        except ValueError:
+            return None
+
+    def _append_matches(self, indices: Indices) -> None:
+        if not self._results or not self._results[-1].query:
+            # Nothing to rank
+            super()._append_matches(indices)
+        elif indices:
+            # New matches can go anywhere in the ranking:
+            self.on_change(self.buffer)
+
+
+class SearchState:
+    """Positions of the items that match a search query
+
+    Items are only tested when a search gets to them, and each one is
+    tested at most once per query, so that cycling through the matches
+    doesn't rescan the list.
+    """
+
+    def __init__(
+        self,
+        query: str,
+        matcher: Matcher,
+        labels: Sequence[str],
+        previous: Optional["SearchState"] = None,
+    ):
+        self.query = query
+        self.matcher = matcher
+        self.labels = labels
+        self.matches: List[int] = []
+        if previous is None:
+            self.tested = bytearray(len(labels))
+        else:
+            # previous is a broader query: the items it rejected don't
+            # have to be tested again, only its matches:
+            self.tested = bytearray(previous.tested)
+            for index in previous.matches:
+                self.tested[index] = 0
+
+    def extend(self, count: int) -> None:
+        self.tested.extend(bytes(count))
+
+    def _test(self, index: int) -> bool:
+        self.tested[index] = 1
+        if self.matcher(self.labels[index]):
+            insort(self.matches, index)
+            return True
+        return False
+
+    def _next(self, start: int, end: int) -> Optional[int]:
+        # First match in [start, end)
+        pos = start
+        while pos < end:
+            known = bisect_left(self.matches, pos)
+            match = self.matches[known] if known < len(self.matches) else end
+            untested = self.tested.find(0, pos, min(match, end))
+            if untested < 0:
+                return match if match < end else None
+            if self._test(untested):
+                return untested
+            pos = untested + 1
+        return None
+
+    def _previous(self, start: int, end: int) -> Optional[int]:
+        # Last match in [start, end)
+        pos = end
+        while pos > start:
+            known = bisect_right(self.matches, pos - 1) - 1
+            match = self.matches[known] if known >= 0 else start - 1
+            untested = self.tested.rfind(0, max(match + 1, start), pos)
+            if untested < 0:
+                return match if match >= start else None
+            if self._test(untested):
+                return untested
+            pos = untested
+        return None
+
+    def next(self, start: int) -> Optional[int]:
+        """Return the first match at start or after it, wrapping around"""
+        found = self._next(start, len(self.tested))
+        if found is None:
+            found = self._next(0, start)
+        return found
+
+    def previous(self, start: int) -> Optional[int]:
+        """Return the last match at start or before it, wrapping around"""
+        found = self._previous(0, start + 1)
+        if found is None:
+            found = self._previous(start + 1, len(self.tested))
+        return found
+
 
+class SearchVertMenuBase(DynVertMenuBase):
+    """Base of the menus that search items instead of filtering them
+
+    Typing searches from the currently selected item onwards; c-n and
+    c-s go to the next match, c-p and c-r to the previous one.
+    """
+
+    _search: Optional[SearchState] = None
+
+    def _init_key_bindings(self) -> KeyBindingsBase:
+        kb = KeyBindings()
+
+        @kb.add("c-n")
+        @kb.add("c-s")
+        def _next(event: E) -> None:
+            self.search_next()
+
+        @kb.add("c-p")
+        @kb.add("c-r")
+        def _previous(event: E) -> None:
+            self.search_previous()
+
+        return merge_key_bindings([super()._init_key_bindings(), kb])
 
-class FuzzSearchVertMenu(DynVertMenuBase):
     def on_change(self, buf: Buffer) -> None:
-        text = buf.document.text
-        regex_str = ".*".join(text)
-        try:
-            regex = re.compile(regex_str, re.IGNORECASE)
-        except re.error:
+        query = self._query(buf.document.text)
+        if query is None:
             return
-        item = next(
-            (item for item in self._all_items if regex.search(to_plain_text(item[0])))
-        )
-        if item:
-            self._vertmenu.control.selected_item = item
+        previous = self._search
+        # Reuse the previous search if the new query narrows it, and if
+        # the items weren't replaced in the meantime:
+        if (
+            previous is None
+            or previous.labels is not query[2]
+            or not query[0].startswith(previous.query)
+            or not self._narrows(previous.query, query[0])
+        ):
+            previous = None
+        self._search = SearchState(*query, previous)
+        self._highlighted = query[0]
+        self._vertmenu.control.clear_line_cache()
+        with measure(self.stats, "search"):
+            index = self._search.next(self.selected or 0)
+        self._go(index)
+
+    def _go(self, index: Optional[int]) -> None:
+        if index is None:
+            self._set_status("no match")
+            return
+        self._set_status("")
+        self._vertmenu.control.selected = index
+
+    def search_next(self) -> None:
+        if self._search is not None and self._all_items:
+            with measure(self.stats, "search"):
+                index = self._search.next(
+                    ((self.selected or 0) + 1) % len(self._all_items)
+                )
+            self._go(index)
+
+    def search_previous(self) -> None:
+        if self._search is not None and self._all_items:
+            with measure(self.stats, "search"):
+                index = self._search.previous((self.selected or 0) - 1)
+            self._go(index)
+
+    def _append_items(self, items: Sequence[Item]) -> None:
+        super()._append_items(items)
+        if self._search is not None:
+            self._search.extend(len(items))
+
+
+class RegexSearchVertMenu(RegexQueryMixin, SearchVertMenuBase):
+    pass
+
+
+class FuzzSearchVertMenu(FuzzQueryMixin, SearchVertMenuBase):
+    pass
@@ -0,0 +1,159 @@
+"""fzf-inspired fuzzy matching and ranking"""
+
+import heapq
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+SCORE_MATCH = 16
+SCORE_GAP_START = -3
+SCORE_GAP_EXTENSION = -1
+BONUS_BOUNDARY = SCORE_MATCH // 2
+BONUS_CAMEL = BONUS_BOUNDARY - 1
+BONUS_CONSECUTIVE = -(SCORE_GAP_START + SCORE_GAP_EXTENSION)
+BONUS_FIRST_CHAR_MULTIPLIER = 2
+
+CHAR_NONWORD, CHAR_LOWER, CHAR_UPPER, CHAR_DIGIT = range(4)
+
+
+def fuzzy_matcher(pattern: str) -> Callable[[str], bool]:
+    """Return a function that checks if pattern is a subsequence of
+    its argument, in linear time
+
+    Both pattern and the texts should already be casefolded.
+    """
+
+    def match(text: str) -> bool:
+        find = text.find
+        pos = -1
+        for char in pattern:
+            pos = find(char, pos + 1)
+            if pos < 0:
+                return False
+        return True
+
+    return match
+
+
+def _char_class(char: str) -> int:
+    if char.islower():
+        return CHAR_LOWER
+    if char.isupper():
+        return CHAR_UPPER
+    if char.isdigit():
+        return CHAR_DIGIT
+    if char.isalpha():
+        return CHAR_LOWER
+    return CHAR_NONWORD
+
+
+def _bonus(prev_class: int, char_class: int) -> int:
+    if char_class == CHAR_NONWORD:
+        return 0
+    if prev_class == CHAR_NONWORD:
+        return BONUS_BOUNDARY
+    if prev_class == CHAR_LOWER and char_class == CHAR_UPPER:
+        return BONUS_CAMEL
+    if prev_class != CHAR_DIGIT and char_class == CHAR_DIGIT:
+        return BONUS_CAMEL
+    return 0
+
+
+def _match_window(pattern: str, folded: str) -> Optional[Tuple[int, int]]:
+    """Find the first occurrence of pattern in folded and shrink it
+    from the left, returning the [start, end) of the window"""
+    find = folded.find
+    pos = -1
+    for char in pattern:
+        pos = find(char, pos + 1)
+        if pos < 0:
+            return None
+    end = pos + 1
+    pos = end
+    rfind = folded.rfind
+    for char in reversed(pattern):
+        pos = rfind(char, 0, pos)
+    return pos, end
+
+
+def fuzzy_score(
+    pattern: str, text: str, folded: Optional[str] = None
+) -> Optional[Tuple[int, List[int]]]:
+    """Score the match of the casefolded pattern in text
+
+    Consecutive matches and matches at word boundaries or camelCase
+    humps score higher, gaps score lower. Returns the score and the
+    positions of the matched characters in the folded text, or None if
+    pattern is not a subsequence of it.
+    """
+    if folded is None:
+        folded = text.casefold()
+    if not pattern:
+        return 0, []
+    window = _match_window(pattern, folded)
+    if window is None:
+        return None
+    start, end = window
+    # Casefolding can change the length of the text (e.g. "ß" -> "ss"),
+    # in which case we can only look at the folded text for the classes:
+    source = text if len(text) == len(folded) else folded
+    prev_class = _char_class(source[start - 1]) if start > 0 else CHAR_NONWORD
+    score = 0
+    pidx = 0
+    in_gap = False
+    consecutive = 0
+    first_bonus = 0
+    positions: List[int] = []
+    for idx in range(start, end):
+        char_class = _char_class(source[idx])
+        if folded[idx] == pattern[pidx]:
+            positions.append(idx)
+            score += SCORE_MATCH
+            bonus = _bonus(prev_class, char_class)
+            if consecutive == 0:
+                first_bonus = bonus
+            else:
+                if bonus >= BONUS_BOUNDARY and bonus > first_bonus:
+                    first_bonus = bonus
+                bonus = max(bonus, first_bonus, BONUS_CONSECUTIVE)
+            if pidx == 0:
+                score += bonus * BONUS_FIRST_CHAR_MULTIPLIER
+            else:
+                score += bonus
+            in_gap = False
+            consecutive += 1
+            pidx += 1
+            if pidx == len(pattern):
+                break
+        else:
+            score += SCORE_GAP_EXTENSION if in_gap else SCORE_GAP_START
+            in_gap = True
+            consecutive = 0
+            first_bonus = 0
+        prev_class = char_class
+    return score, positions
+
+
+def fuzzy_rank(
+    pattern: str,
+    candidates: Iterable[int],
+    plain: Sequence[str],
+    folded: Sequence[str],
+    limit: Optional[int] = None,
+) -> List[int]:
+    """Return the indices of the best matches of pattern among the
+    candidates, best first
+
+    Ties are broken by label length and then by original order. With a
+    limit, only the top limit matches are kept in a heap instead of
+    sorting all of them.
+    """
+    scored = []
+    for index in candidates:
+        result = fuzzy_score(pattern, plain[index], folded[index])
+        if result is not None:
+            scored.append((result[0], -len(plain[index]), -index))
+    if limit is None:
+        scored.sort(reverse=True)
+        best = scored
+    else:
+        best = heapq.nlargest(limit, scored)
+    return [-key[2] for key in best]
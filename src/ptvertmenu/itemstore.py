@@ -0,0 +1,216 @@
+"""Compact item containers for large menus"""
+
+from array import array
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
+
+from prompt_toolkit.formatted_text import AnyFormattedText
+
+from .bitset import Bitset
+
+Item = Tuple[AnyFormattedText, Any]
+
+
+class ItemStore(Sequence[Item]):
+    """Items kept as separate lists of labels and values
+
+    Saves the (label, value) tuple of each item, which is only created
+    when the item is accessed. The menus use the store as it is, without
+    copying it, so it should only be changed through the menu after
+    being handed to it.
+    """
+
+    __slots__ = ("labels", "values")
+
+    def __init__(self, items: Iterable[Item] = ()):
+        self.labels: List[AnyFormattedText] = []
+        self.values: List[Any] = []
+        self.extend(items)
+
+    @classmethod
+    def from_columns(
+        cls, labels: Iterable[AnyFormattedText], values: Iterable[Any]
+    ) -> "ItemStore":
+        store = cls()
+        store.labels.extend(labels)
+        store.values.extend(values)
+        if len(store.labels) != len(store.values):
+            raise ValueError("labels and values have different lengths")
+        return store
+
+    def extend(self, items: Iterable[Item]) -> None:
+        if isinstance(items, ItemStore):
+            self.labels.extend(items.labels)
+            self.values.extend(items.values)
+            return
+        for label, value in items:
+            self.labels.append(label)
+            self.values.append(value)
+
+    def append(self, item: Item) -> None:
+        self.labels.append(item[0])
+        self.values.append(item[1])
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @overload
+    def __getitem__(self, index: int) -> Item: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Item]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Item, Sequence[Item]]:
+        if isinstance(index, slice):
+            return list(zip(self.labels[index], self.values[index]))
+        return self.labels[index], self.values[index]
+
+
+class ItemView(Sequence[Item]):
+    """The items of base at the given indices
+
+    Used for the results of the dynamic menus: a view costs the size of
+    its indices - nothing for a range, 4 bytes per item otherwise -
+    instead of a new sequence of items.
+    """
+
+    __slots__ = ("base", "indices")
+
+    def __init__(self, base: Sequence[Item], indices: Sequence[int]):
+        self.base = base
+        self.indices: Sequence[int] = (
+            indices if isinstance(indices, (range, array)) else array("I", indices)
+        )
+
+    def extend(self, indices: Sequence[int]) -> None:
+        current = self.indices
+        if (
+            isinstance(current, range)
+            and isinstance(indices, range)
+            and current.step == indices.step == 1
+            and current.stop == indices.start
+        ):
+            self.indices = range(current.start, indices.stop)
+            return
+        if not isinstance(current, array):
+            current = array("I", current)
+        current.extend(indices)
+        self.indices = current
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    @overload
+    def __getitem__(self, index: int) -> Item: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Item]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Item, Sequence[Item]]:
+        if isinstance(index, slice):
+            return ItemView(self.base, self.indices[index])
+        return self.base[self.indices[index]]
+
+
+def item_sequence(items: Iterable[Item]) -> Sequence[Item]:
+    """Return items as a sequence the menus can keep
+
+    Item stores and views are used as they are, anything else is copied
+    to a list.
+    """
+    if isinstance(items, (ItemStore, ItemView)):
+        return items
+    return list(items)
+
+
+class ReadOnlyItems(Sequence[Item]):
+    """Read-only view of the items kept by a menu
+
+    Returned by the items properties instead of a copy, and equal to
+    any other sequence with the same items, tuples included.
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items: Sequence[Item]):
+        self._items = items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Item]:
+        return iter(self._items)
+
+    @overload
+    def __getitem__(self, index: int) -> Item: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Item]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Item, Sequence[Item]]:
+        if isinstance(index, slice):
+            return ReadOnlyItems(self._items[index])
+        return self._items[index]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (str, bytes)) or not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            mine == theirs for mine, theirs in zip(self, other)
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"ReadOnlyItems({list(self._items)!r})"
+
+
+class MarkedItems(Sequence[Item]):
+    """The items of base at the positions in marks, in order
+
+    Takes a copy of marks, and only builds the list of positions when
+    the items are accessed by index; iterating goes through the bits.
+    """
+
+    __slots__ = ("base", "marks", "_positions")
+
+    def __init__(self, base: Sequence[Item], marks: Bitset):
+        self.base = base
+        self.marks = marks.copy()
+        self._positions: Optional["array[int]"] = None
+
+    def _get_positions(self) -> "array[int]":
+        if self._positions is None:
+            self._positions = array("I", self.marks)
+        return self._positions
+
+    def __len__(self) -> int:
+        if self._positions is None:
+            return len(self.marks)
+        return len(self._positions)
+
+    def __iter__(self) -> Iterator[Item]:
+        base = self.base
+        for position in self._positions or self.marks:
+            yield base[position]
+
+    @overload
+    def __getitem__(self, index: int) -> Item: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Item]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Item, Sequence[Item]]:
+        positions = self._get_positions()
+        if isinstance(index, slice):
+            return ItemView(self.base, positions[index])
+        return self.base[positions[index]]
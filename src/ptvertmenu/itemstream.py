@@ -0,0 +1,136 @@
+"""Incremental loading of menu items from iterators"""
+
+import asyncio
+import time
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from prompt_toolkit.application import get_app
+
+from .vertmenuuicontrol import Item
+
+ItemSource = Union[Iterable[Item], AsyncIterable[Item]]
+
+
+class ThreadedItems(Iterable[Item]):
+    """Items of a blocking iterable, to be streamed from an executor
+
+    Wrap an iterable in this to have the menus stream it from a thread
+    instead of reading it up front. The iterable has to be usable from
+    that thread: sqlite cursors, for instance, are not.
+    """
+
+    def __init__(self, items: Iterable[Item]):
+        self.items = items
+
+    def __iter__(self) -> Iterator[Item]:
+        return iter(self.items)
+
+
+def is_stream(items: ItemSource) -> bool:
+    """Check if items should be streamed instead of read up front
+
+    Async iterables and ThreadedItems are streamed, anything else is
+    read up front.
+    """
+    return isinstance(items, (AsyncIterable, ThreadedItems))
+
+
+def _take(iterator: Iterator[Item], interval: float) -> Tuple[List[Item], bool]:
+    """Read items until interval seconds have passed, return them and
+    whether the iterator is exhausted"""
+    batch: List[Item] = []
+    deadline = time.monotonic() + interval
+    for item in iterator:
+        batch.append(item)
+        if time.monotonic() >= deadline:
+            return batch, False
+    return batch, True
+
+
+class ItemStream:
+    """Feed items from a (possibly async) iterator in batches
+
+    Items are collected for at most interval seconds before being
+    handed to on_batch on the event loop, which coalesces the redraws
+    of fast sources. ThreadedItems are read in an executor. Errors of
+    the source stop the stream and go to the exception handler of the
+    loop.
+    """
+
+    def __init__(
+        self,
+        source: ItemSource,
+        on_batch: Callable[[Sequence[Item]], None],
+        interval: float = 0.05,
+    ):
+        self.source = source
+        self.on_batch = on_batch
+        self.interval = interval
+        self.done = False
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def start(self) -> None:
+        """Start streaming, if not done yet and if there is a running
+        event loop"""
+        if self._task is not None or self.done:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self.run())
+
+    def cancel(self) -> None:
+        self.done = True
+        if self._task is not None:
+            self._task.cancel()
+
+    def _publish(self, batch: Sequence[Item]) -> None:
+        if batch:
+            self.on_batch(batch)
+            get_app().invalidate()
+
+    async def run(self) -> None:
+        try:
+            if isinstance(self.source, AsyncIterable):
+                await self._run_async(self.source.__aiter__())
+            else:
+                await self._run_sync(iter(self.source))
+        except Exception as exc:
+            asyncio.get_running_loop().call_exception_handler(
+                {"message": "Error streaming items", "exception": exc}
+            )
+        finally:
+            self.done = True
+
+    async def _run_sync(self, iterator: Iterator[Item]) -> None:
+        loop = asyncio.get_running_loop()
+        done = False
+        while not done:
+            batch, done = await loop.run_in_executor(
+                None, _take, iterator, self.interval
+            )
+            self._publish(batch)
+
+    async def _run_async(self, iterator: AsyncIterator[Item]) -> None:
+        loop = asyncio.get_running_loop()
+        batch: List[Item] = []
+        deadline = loop.time() + self.interval
+        async for item in iterator:
+            batch.append(item)
+            if loop.time() >= deadline:
+                self._publish(batch)
+                batch = []
+                deadline = loop.time() + self.interval
+        self._publish(batch)
@@ -0,0 +1,37 @@
+"""Plain-text label store for the dynamic menus"""
+
+from array import array
+from typing import Iterable, List
+
+from .itemstore import Item, ItemStore
+from .vertmenuuicontrol import label_metrics, label_text
+
+
+class LabelStore:
+    """Plain and casefolded text, number of lines and display width of
+    the labels of a sequence of items
+
+    Built once when the items are set, so that matching doesn't have
+    to flatten the formatted text of every label on each keystroke.
+    """
+
+    def __init__(self, items: Iterable[Item] = ()):
+        self.plain: List[str] = []
+        self.folded: List[str] = []
+        self.lines = array("I")
+        self.widths = array("I")
+        self.extend(items)
+
+    def extend(self, items: Iterable[Item]) -> None:
+        if isinstance(items, ItemStore):
+            plain = [label_text(label) for label in items.labels]
+        else:
+            plain = [label_text(item[0]) for item in items]
+        self.plain.extend(plain)
+        self.folded.extend([text.casefold() for text in plain])
+        metrics = [label_metrics(text) for text in plain]
+        self.lines.extend([metric[0] for metric in metrics])
+        self.widths.extend([metric[1] for metric in metrics])
+
+    def __len__(self) -> int:
+        return len(self.plain)
@@ -0,0 +1,168 @@
+"""Process pool filter backend for very large menus"""
+
+import multiprocessing
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+Matcher = Callable[[str], object]
+MatcherFactory = Callable[[str], Optional[Matcher]]
+
+
+def _worker(conn: Connection) -> None:
+    """Keep a shard of the labels and match them on request"""
+    shard: List[str] = []
+    start = 0
+    while True:
+        message = conn.recv()
+        if message is None:
+            return
+        if message[0] == "load":
+            _, data_name, offsets_name, start, end = message
+            data = SharedMemory(data_name)
+            offsets_shm = SharedMemory(offsets_name)
+            assert data.buf is not None and offsets_shm.buf is not None
+            offsets = offsets_shm.buf.cast("Q")
+            base = offsets[start]
+            raw = bytes(data.buf[base : offsets[end]])
+            shard = [
+                raw[offsets[i] - base : offsets[i + 1] - base].decode()
+                for i in range(start, end)
+            ]
+            offsets.release()
+            data.close()
+            offsets_shm.close()
+            conn.send(None)
+        else:
+            _, factory, query, candidates = message
+            matcher = factory(query)
+            assert matcher is not None
+            if candidates is None:
+                found = array(
+                    "I", (start + i for i, label in enumerate(shard) if matcher(label))
+                )
+            else:
+                wanted = array("I")
+                wanted.frombytes(candidates)
+                found = array("I", (i for i in wanted if matcher(shard[i - start])))
+            conn.send_bytes(found.tobytes())
+
+
+class ParallelFilter:
+    """Match labels in a set of worker processes
+
+    The labels are split in one contiguous shard per worker and handed
+    to the workers through shared memory once, when they change; after
+    that, each query only sends the matcher factory, the query string
+    and the candidate indices. The matches are merged in the original
+    order.
+
+    Stores with fewer than threshold candidates are not worth the
+    round-trip and are left for in-process matching.
+    """
+
+    def __init__(self, workers: Optional[int] = None, threshold: int = 100000):
+        self.workers = workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._processes: List[Tuple[BaseProcess, Connection]] = []
+        self._bounds: List[int] = []
+        # The labels the workers have, and how many of them:
+        self._loaded: Tuple[Optional[Sequence[str]], int] = (None, 0)
+
+    def _start(self) -> None:
+        context = multiprocessing.get_context("spawn")
+        for _ in range(self.workers):
+            conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker, args=(child_conn,), daemon=True)
+            process.start()
+            child_conn.close()
+            self._processes.append((process, conn))
+
+    def _load(self, labels: Sequence[str]) -> None:
+        if not self._processes:
+            self._start()
+        encoded = [label.encode() for label in labels]
+        offsets = array("Q", accumulate(map(len, encoded), initial=0))
+        data = b"".join(encoded)
+        data_shm = SharedMemory(create=True, size=max(1, len(data)))
+        offsets_shm = SharedMemory(create=True, size=len(offsets) * offsets.itemsize)
+        try:
+            assert data_shm.buf is not None and offsets_shm.buf is not None
+            data_shm.buf[: len(data)] = data
+            offsets_shm.buf[: len(offsets) * offsets.itemsize] = offsets.tobytes()
+            size = len(labels)
+            self._bounds = [size * i // self.workers for i in range(self.workers + 1)]
+            for i, (_, conn) in enumerate(self._processes):
+                conn.send(
+                    (
+                        "load",
+                        data_shm.name,
+                        offsets_shm.name,
+                        self._bounds[i],
+                        self._bounds[i + 1],
+                    )
+                )
+            for _, conn in self._processes:
+                conn.recv()
+        finally:
+            data_shm.close()
+            data_shm.unlink()
+            offsets_shm.close()
+            offsets_shm.unlink()
+        self._loaded = (labels, len(labels))
+
+    def filter(
+        self,
+        factory: MatcherFactory,
+        query: str,
+        labels: Sequence[str],
+        candidates: Sequence[int],
+    ) -> Optional[List[int]]:
+        """Return the sorted candidates whose labels match the matcher
+        that factory creates for query, or None if there are too few
+        candidates to bother
+
+        factory must be picklable (a module-level function) and
+        candidates must be sorted.
+        """
+        if len(candidates) < self.threshold:
+            return None
+        with self._lock:
+            if self._loaded[0] is not labels or self._loaded[1] != len(labels):
+                self._load(labels)
+            everything = isinstance(candidates, range) and candidates == range(
+                len(labels)
+            )
+            for i, (_, conn) in enumerate(self._processes):
+                shard: Any = None
+                if not everything:
+                    lo = bisect_left(candidates, self._bounds[i])
+                    hi = bisect_left(candidates, self._bounds[i + 1])
+                    shard = array("I", candidates[lo:hi]).tobytes()
+                conn.send(("filter", factory, query, shard))
+            found = array("I")
+            for _, conn in self._processes:
+                found.frombytes(conn.recv_bytes())
+        return found.tolist()
+
+    def close(self) -> None:
+        with self._lock:
+            for process, conn in self._processes:
+                conn.send(None)
+                conn.close()
+                process.join()
+            self._processes = []
+            self._loaded = (None, 0)
+
+    def __enter__(self) -> "ParallelFilter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
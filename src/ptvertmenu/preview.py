@@ -0,0 +1,184 @@
+"""Preview pane for the selected item of a menu"""
+
+import asyncio
+import inspect
+from collections import OrderedDict
+from typing import (
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Hashable,
+    Optional,
+    Union,
+)
+
+from prompt_toolkit.application import get_app
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.document import Document
+from prompt_toolkit.layout.containers import Container, Window
+from prompt_toolkit.layout.controls import BufferControl, UIContent
+
+from .vertmenuuicontrol import Item
+
+PreviewResult = Union[str, Awaitable[str], AsyncIterable[str]]
+PreviewLoader = Callable[[Item], PreviewResult]
+
+
+class PreviewControl(BufferControl):
+    """BufferControl that starts the pending load of its pane when it's
+    first rendered, if there was no event loop running before that"""
+
+    def __init__(self, pane: "PreviewPane", buffer: Buffer):
+        super().__init__(buffer=buffer, focusable=True)
+        self.pane = pane
+
+    def create_content(
+        self, width: int, height: int, preview_search: bool = False
+    ) -> UIContent:
+        self.pane._start_pending()
+        return super().create_content(width, height, preview_search)
+
+
+class PreviewPane:
+    """Read-only text area that shows a preview of the selected item
+
+    Pass its selected_handler to the menu. loader gets the item and
+    returns the preview text; it can be:
+    - a regular function, which is run in an executor;
+    - a coroutine function, or a function that returns an awaitable;
+    - an async generator function, or a function that returns an async
+      iterable, whose chunks are shown as they come.
+
+    Selecting another item cancels the load in progress, and the
+    results of stale loads are never shown. Complete previews are kept
+    in an LRU, keyed by key(item), that holds up to cache_size
+    characters. loading_text is shown if loading takes more than
+    loading_delay seconds.
+    """
+
+    def __init__(
+        self,
+        loader: PreviewLoader,
+        key: Callable[[Item], Hashable] = lambda item: item[1],
+        cache_size: int = 1 << 22,
+        loading_text: str = "Loading...",
+        loading_delay: float = 0.05,
+        wrap_lines: bool = True,
+    ):
+        self.loader = loader
+        self.key = key
+        self.cache_size = cache_size
+        self.loading_text = loading_text
+        self.loading_delay = loading_delay
+        self._cache: OrderedDict[Hashable, str] = OrderedDict()
+        self._cached_chars = 0
+        self._task: Optional[asyncio.Task[None]] = None
+        # Item to load as soon as there's an event loop:
+        self._pending: Optional[Item] = None
+        self.buffer = Buffer(read_only=True)
+        self.control = PreviewControl(self, self.buffer)
+        self.window = Window(self.control, wrap_lines=wrap_lines)
+
+    @property
+    def text(self) -> str:
+        return self.buffer.text
+
+    @text.setter
+    def text(self, text: str) -> None:
+        self._set_text(text)
+
+    def _set_text(self, text: str, keep_cursor: bool = False) -> None:
+        cursor = 0
+        if keep_cursor:
+            # Keep the cursor, and with it the scroll, of partial content:
+            cursor = min(self.buffer.cursor_position, len(text))
+        self.buffer.set_document(Document(text, cursor), bypass_readonly=True)
+        get_app().invalidate()
+
+    def selected_handler(self, item: Optional[Item], index: Optional[int]) -> None:
+        self.show(item)
+
+    def show(self, item: Optional[Item]) -> None:
+        """Show the preview of item, replacing the current one"""
+        self.cancel()
+        if item is None:
+            self._set_text("")
+            return
+        cached = self._cache_get(item)
+        if cached is not None:
+            self._set_text(cached)
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._pending = item
+            return
+        self._task = loop.create_task(self._load(item))
+
+    def cancel(self) -> None:
+        """Cancel the load in progress"""
+        self._pending = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _start_pending(self) -> None:
+        if self._pending is not None:
+            self.show(self._pending)
+
+    def _cache_get(self, item: Item) -> Optional[str]:
+        key = self.key(item)
+        text = self._cache.get(key)
+        if text is not None:
+            self._cache.move_to_end(key)
+        return text
+
+    def _cache_put(self, item: Item, text: str) -> None:
+        if len(text) > self.cache_size:
+            return
+        key = self.key(item)
+        previous = self._cache.pop(key, None)
+        if previous is not None:
+            self._cached_chars -= len(previous)
+        self._cache[key] = text
+        self._cached_chars += len(text)
+        while self._cached_chars > self.cache_size:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_chars -= len(evicted)
+
+    async def _load(self, item: Item) -> None:
+        loop = asyncio.get_running_loop()
+        placeholder = loop.call_later(
+            self.loading_delay, self._set_text, self.loading_text
+        )
+        partial = False
+        try:
+            loader = self.loader
+            result: PreviewResult
+            if inspect.iscoroutinefunction(loader) or inspect.isasyncgenfunction(
+                loader
+            ):
+                result = loader(item)
+            else:
+                result = await loop.run_in_executor(None, loader, item)
+            if inspect.isawaitable(result):
+                text = await result
+            elif isinstance(result, AsyncIterable):
+                text = ""
+                async for chunk in result:
+                    placeholder.cancel()
+                    text += chunk
+                    self._set_text(text, keep_cursor=partial)
+                    partial = True
+            else:
+                text = result
+        except Exception as exc:
+            self._set_text(f"Error: {exc}")
+            return
+        finally:
+            placeholder.cancel()
+        self._cache_put(item, text)
+        self._set_text(text, keep_cursor=partial)
+
+    def __pt_container__(self) -> Container:
+        return self.window
@@ -0,0 +1,59 @@
+"""Operation counters and timings for the menus"""
+
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Dict, Iterator, Optional
+
+StatsCallback = Callable[[str, float], None]
+
+
+class Stats:
+    """Count and time the operations of a menu
+
+    Each operation is recorded under a name - "filter", "search",
+    "mappings", "create_content", "get_line" and "handler" - with the
+    number of times it ran and its total and last durations, in
+    seconds. The callback, if given, is called with the name and
+    duration of each operation as it is recorded, so that they can be
+    forwarded to other metrics systems.
+    """
+
+    def __init__(self, callback: Optional[StatsCallback] = None):
+        self.callback = callback
+        self.counts: Dict[str, int] = {}
+        self.total: Dict[str, float] = {}
+        self.last: Dict[str, float] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        self.counts[name] = self.counts.get(name, 0) + 1
+        self.total[name] = self.total.get(name, 0.0) + seconds
+        self.last[name] = seconds
+        if self.callback is not None:
+            self.callback(name, seconds)
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def reset(self) -> None:
+        self.counts.clear()
+        self.total.clear()
+        self.last.clear()
+
+    def __str__(self) -> str:
+        return "\n".join(
+            f"{name}: {count} in {self.total[name]:.6f}s"
+            f" (last {self.last[name]:.6f}s)"
+            for name, count in sorted(self.counts.items())
+        )
+
+
+def measure(stats: Optional[Stats], name: str) -> ContextManager[None]:
+    """Measure name in stats, if there are any"""
+    if stats is None:
+        return nullcontext()
+    return stats.measure(name)
@@ -0,0 +1,359 @@
+"""Vertical menu of a lazily expanded tree"""
+
+import asyncio
+import inspect
+from array import array
+from functools import partial
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from prompt_toolkit.application import get_app
+from prompt_toolkit.formatted_text import StyleAndTextTuples, split_lines
+from prompt_toolkit.key_binding import KeyBindings
+from prompt_toolkit.key_binding.key_processor import KeyPressEvent
+
+from .itemstream import ItemSource
+from .stats import Stats
+from .vertmenu import VertMenu
+from .vertmenuuicontrol import Index, Item, SelectedHandler, VertMenuUIControl
+
+E = KeyPressEvent
+
+# Returns the children of an item, or an awaitable with them:
+ChildrenLoader = Callable[[Item], Union[Iterable[Item], Awaitable[Iterable[Item]]]]
+
+MARKER_COLLAPSED = "▸ "
+MARKER_EXPANDED = "▾ "
+MARKER_LEAF = "  "
+
+
+class TreeVertMenuUIControl(VertMenuUIControl):
+    """VertMenuUIControl that shows a tree, expanding nodes on demand
+
+    The items are the roots of the tree. The children of an item are
+    obtained from loader only when it's first expanded, and then kept,
+    keyed by key(item). The loader can be a coroutine function, in
+    which case it runs in a task while the interface is still usable.
+    Only the visible rows are kept in the menu: expanding or collapsing
+    a node splices its visible descendants in or out, which costs the
+    size of that subtree. Descendants that were expanded show up
+    expanded again when their ancestor is expanded.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[Item],
+        loader: ChildrenLoader,
+        has_children: Callable[[Item], bool] = lambda item: True,
+        key: Callable[[Item], Hashable] = lambda item: item[1],
+        indent: int = 2,
+        **kwargs: Any,
+    ):
+        self.loader = loader
+        self.has_children = has_children
+        self.key = key
+        self.indent = indent
+        items = list(items)
+        # Depth of each visible row:
+        self._depths = array("I", [0]) * len(items)
+        self._children: Dict[Hashable, List[Item]] = {}
+        self._expanded: Set[Hashable] = set()
+        self._loading: Dict[Hashable, "asyncio.Future[Iterable[Item]]"] = {}
+        super().__init__(items, **kwargs)
+
+    def set_items(
+        self,
+        items: Iterable[Item],
+        selected: Optional[int] = None,
+        lines: Optional[Sequence[int]] = None,
+        widths: Optional[Sequence[int]] = None,
+    ) -> None:
+        """Replace the roots, forgetting the loaded children"""
+        items = list(items)
+        self._depths = array("I", [0]) * len(items)
+        for task in self._loading.values():
+            task.cancel()
+        self._loading.clear()
+        self._children.clear()
+        self._expanded.clear()
+        super().set_items(items, selected, lines, widths)
+
+    def append_items(
+        self,
+        items: Iterable[Item],
+        lines: Optional[Sequence[int]] = None,
+        widths: Optional[Sequence[int]] = None,
+    ) -> None:
+        """Add roots to the end of the tree"""
+        items = list(items)
+        self._depths.extend(array("I", [0]) * len(items))
+        super().append_items(items, lines, widths)
+
+    def depth(self, index: int) -> int:
+        return self._depths[index]
+
+    def is_expanded(self, index: int) -> bool:
+        return self.key(self._items[index]) in self._expanded
+
+    def parent(self, index: int) -> Optional[int]:
+        """Return the index of the parent of the row at index, None for
+        the roots"""
+        depth = self._depths[index]
+        for i in range(index - 1, -1, -1):
+            if self._depths[i] < depth:
+                return i
+        return None
+
+    def _subtree_end(self, index: int) -> int:
+        depth = self._depths[index]
+        end = index + 1
+        while end < len(self._depths) and self._depths[end] > depth:
+            end += 1
+        return end
+
+    def _visible(self, key: Hashable, depth: int) -> Tuple[List[Item], List[int]]:
+        """Return the rows of the loaded and expanded descendants of the
+        item with key, and their depths"""
+        items: List[Item] = []
+        depths: List[int] = []
+        for child in self._children[key]:
+            items.append(child)
+            depths.append(depth)
+            childkey = self.key(child)
+            if childkey in self._expanded and childkey in self._children:
+                more, moredepths = self._visible(childkey, depth + 1)
+                items.extend(more)
+                depths.extend(moredepths)
+        return items, depths
+
+    def _show_children(self, index: int) -> None:
+        key = self.key(self._items[index])
+        items, depths = self._visible(key, self._depths[index] + 1)
+        self._depths[index + 1 : index + 1] = array("I", depths)
+        self.splice_items(index + 1, index + 1, items)
+        get_app().invalidate()
+
+    def _target(self, index: Optional[int]) -> Optional[int]:
+        if index is None:
+            return self.selected
+        return index
+
+    def expand(self, index: Optional[int] = None) -> None:
+        """Expand the node at index, or the selected one, loading its
+        children if that's the first time"""
+        index = self._target(index)
+        if index is None:
+            return
+        item = self._items[index]
+        key = self.key(item)
+        if key in self._expanded or not self.has_children(item):
+            return
+        self._expanded.add(key)
+        if key in self._children:
+            self._show_children(index)
+            return
+        result = self.loader(item)
+        if not inspect.isawaitable(result):
+            self._children[key] = list(result)
+            self._show_children(index)
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._expanded.discard(key)
+            if inspect.iscoroutine(result):
+                result.close()
+            raise
+        task = asyncio.ensure_future(result, loop=loop)
+        task.add_done_callback(partial(self._loaded, index, key))
+        self._loading[key] = task
+        # Update the marker:
+        self.clear_line_cache()
+
+    def _loaded(
+        self, index: int, key: Hashable, task: "asyncio.Future[Iterable[Item]]"
+    ) -> None:
+        if task.cancelled():
+            return
+        self._loading.pop(key, None)
+        exc = task.exception()
+        if exc is not None:
+            self._expanded.discard(key)
+            self.clear_line_cache()
+            get_app().invalidate()
+            task.get_loop().call_exception_handler(
+                {"message": "Error loading children", "exception": exc}
+            )
+            return
+        self._children[key] = list(task.result())
+        if key not in self._expanded:
+            return
+        # Rows may have been added or removed above the node meanwhile:
+        if index >= len(self._items) or self.key(self._items[index]) != key:
+            for index, item in enumerate(self._items):
+                if self.key(item) == key:
+                    break
+            else:
+                return
+        self._show_children(index)
+
+    def collapse(self, index: Optional[int] = None) -> None:
+        """Collapse the node at index, or the selected one"""
+        index = self._target(index)
+        if index is None:
+            return
+        key = self.key(self._items[index])
+        if key not in self._expanded:
+            return
+        self._expanded.discard(key)
+        end = self._subtree_end(index)
+        if self._loading:
+            # Loads of the hidden nodes are not going to be shown:
+            for i in range(index, end):
+                hidden = self.key(self._items[i])
+                task = self._loading.pop(hidden, None)
+                if task is not None:
+                    task.cancel()
+                    self._expanded.discard(hidden)
+        del self._depths[index + 1 : end]
+        self.splice_items(index + 1, end, ())
+        get_app().invalidate()
+
+    def toggle(self, index: Optional[int] = None) -> None:
+        index = self._target(index)
+        if index is None:
+            return
+        if self.is_expanded(index):
+            self.collapse(index)
+        else:
+            self.expand(index)
+
+    def _prefix(self, index: Index) -> Tuple[str, str]:
+        """Prefix of the first and of the other lines of a row"""
+        item = self._items[index]
+        pad = " " * (self.indent * self._depths[index])
+        if self.key(item) in self._expanded:
+            marker = MARKER_EXPANDED
+        elif self.has_children(item):
+            marker = MARKER_COLLAPSED
+        else:
+            marker = MARKER_LEAF
+        return pad + marker, pad + " " * len(marker)
+
+    def _item_fragments(self, index: Index) -> StyleAndTextTuples:
+        first, other = self._prefix(index)
+        result: StyleAndTextTuples = []
+        for lineno, line in enumerate(split_lines(super()._item_fragments(index))):
+            if lineno:
+                result.append(("", "\n"))
+            result.append(("class:vertmenu.marker", other if lineno else first))
+            result.extend(line)
+        return result
+
+    def _label_metrics(
+        self, start: int, stop: int
+    ) -> Tuple[Sequence[int], Sequence[int]]:
+        lines, widths = super()._label_metrics(start, stop)
+        if widths:
+            prefix = len(MARKER_LEAF)
+            widths = [
+                width + prefix + self.indent * self._depths[index]
+                for index, width in zip(range(start, stop), widths)
+            ]
+        return lines, widths
+
+
+class TreeVertMenu(VertMenu):
+    """VertMenu of a tree whose nodes are expanded on demand
+
+    items are the roots; see TreeVertMenuUIControl for loader,
+    has_children and key. Right expands the selected node, left
+    collapses it or goes to its parent.
+    """
+
+    control: TreeVertMenuUIControl
+
+    def __init__(
+        self,
+        items: ItemSource,
+        loader: ChildrenLoader,
+        has_children: Callable[[Item], bool] = lambda item: True,
+        key: Callable[[Item], Hashable] = lambda item: item[1],
+        selected_item: Optional[Item] = None,
+        selected_handler: Optional[SelectedHandler] = None,
+        accept_handler: Optional[Callable[[Item], None]] = None,
+        focusable: bool = True,
+        max_width: Optional[int] = None,
+        stats: Optional[Stats] = None,
+        handler_delay: Optional[float] = None,
+        indent: int = 2,
+        multiselect: bool = False,
+        accept_marked_handler: Optional[Callable[[Sequence[Item]], None]] = None,
+    ):
+        self.loader = loader
+        self.has_children = has_children
+        self.key = key
+        self.indent = indent
+        super().__init__(
+            items,
+            selected_item,
+            selected_handler,
+            accept_handler,
+            focusable,
+            max_width,
+            stats,
+            handler_delay,
+            multiselect,
+            accept_marked_handler,
+        )
+
+    def _init_control(
+        self, items: Iterable[Item], **kwargs: Any
+    ) -> TreeVertMenuUIControl:
+        return TreeVertMenuUIControl(
+            items,
+            self.loader,
+            self.has_children,
+            self.key,
+            self.indent,
+            **kwargs,
+        )
+
+    def _init_key_bindings(self) -> KeyBindings:
+        kb = super()._init_key_bindings()
+
+        @kb.add("right")
+        @kb.add("+")
+        def _expand(event: E) -> None:
+            self.control.expand()
+
+        @kb.add("left")
+        @kb.add("-")
+        def _collapse(event: E) -> None:
+            self.collapse_or_parent()
+
+        return kb
+
+    def collapse_or_parent(self) -> None:
+        control = self.control
+        selected = control.selected
+        if selected is None:
+            return
+        if control.is_expanded(selected):
+            control.collapse(selected)
+            return
+        parent = control.parent(selected)
+        if parent is not None:
+            control.selected = parent
@@ -0,0 +1,116 @@
+"""Trigram index that narrows down the labels a regex can match"""
+
+import re
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+try:
+    from re import _parser as sre_parse  # type: ignore[attr-defined]
+except ImportError:  # pragma: no cover - python < 3.11
+    import sre_parse
+
+# Opcodes of the parsed regex:
+LITERAL = sre_parse.LITERAL
+SUBPATTERN = sre_parse.SUBPATTERN
+REPEATS = {sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT}
+# Zero-width assertions, which don't separate the literals around them:
+ANCHORS = {sre_parse.AT}
+if hasattr(sre_parse, "POSSESSIVE_REPEAT"):
+    REPEATS.add(sre_parse.POSSESSIVE_REPEAT)
+
+
+def _literals(items: Any, run: List[str], found: List[str]) -> None:
+    for op, arg in items:
+        if op == LITERAL:
+            run.append(chr(arg))
+        elif op in ANCHORS:
+            pass
+        elif op == SUBPATTERN and not arg[1] & re.IGNORECASE:
+            # A group is matched in place, continuing the run:
+            _literals(arg[-1], run, found)
+        else:
+            found.append("".join(run))
+            run.clear()
+            if op in REPEATS and arg[0] >= 1:
+                # What has to be repeated at least once is required:
+                _literals(arg[2], run, found)
+                found.append("".join(run))
+                run.clear()
+
+
+def required_literals(query: str) -> Optional[List[str]]:
+    """Return the strings that every match of the regex query contains,
+    or None if it can't be parsed or is case-insensitive
+
+    Alternatives and character classes are left out, so the result can
+    miss some of the strings, but never has one that isn't required.
+    """
+    try:
+        parsed = sre_parse.parse(query)
+    except (re.error, RecursionError):
+        return None
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    run: List[str] = []
+    found: List[str] = []
+    _literals(parsed, run, found)
+    found.append("".join(run))
+    return [literal for literal in found if literal]
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Indices of the labels that contain each trigram
+
+    Used to get the labels that can match a regex without testing all
+    of them: only the ones that have all trigrams of the required
+    literals of the regex are candidates.
+    """
+
+    def __init__(self, labels: Sequence[str] = ()):
+        self.postings: Dict[str, "array[int]"] = {}
+        self.extend(labels)
+
+    def extend(self, labels: Sequence[str], start: int = 0) -> None:
+        """Index the labels from start onwards, which should be the
+        ones that were appended since the last call"""
+        postings = self.postings
+        for index in range(start, len(labels)):
+            for trigram in trigrams(labels[index]):
+                posting = postings.get(trigram)
+                if posting is None:
+                    posting = postings[trigram] = array("I")
+                posting.append(index)
+
+    def candidates(self, query: str) -> Optional[List[int]]:
+        """Return the sorted indices of the labels that can match the
+        regex query, or None if the index can't tell"""
+        literals = required_literals(query)
+        if literals is None:
+            return None
+        wanted = set().union(*map(trigrams, literals))
+        if not wanted:
+            return None
+        postings = []
+        for trigram in wanted:
+            posting = self.postings.get(trigram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        result = list(postings[0])
+        for posting in postings[1:]:
+            # The postings are sorted, and usually much longer than the
+            # result:
+            result = [
+                i
+                for i in result
+                if (pos := bisect_left(posting, i)) < len(posting) and posting[pos] == i
+            ]
+            if not result:
+                break
+        return result
@@ -1,13 +1,16 @@
 """Vertical menu widget for prompt-toolkit"""
 
-from typing import Callable, Iterable, Optional, Tuple
+from typing import Any, Callable, Iterable, Optional, Sequence, cast
 
 from prompt_toolkit.application import get_app
+from prompt_toolkit.filters import Condition
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.key_binding.key_processor import KeyPressEvent
 from prompt_toolkit.layout.containers import Container, Window
 
-from .vertmenuuicontrol import Item, VertMenuUIControl
+from .itemstream import ItemSource, ItemStream, is_stream
+from .stats import Stats
+from .vertmenuuicontrol import Item, SelectedHandler, VertMenuUIControl
 
 E = KeyPressEvent
 
@@ -15,30 +18,45 @@ E = KeyPressEvent
 class VertMenu:
     def __init__(
         self,
-        items: Iterable[Item],
+        items: ItemSource,
         selected_item: Optional[Item] = None,
-        selected_handler: Optional[
-            Callable[[Optional[Item], Optional[int]], None]
-        ] = None,
+        selected_handler: Optional[SelectedHandler] = None,
         accept_handler: Optional[Callable[[Item], None]] = None,
         focusable: bool = True,
         max_width: Optional[int] = None,
+        stats: Optional[Stats] = None,
+        handler_delay: Optional[float] = None,
+        multiselect: bool = False,
+        accept_marked_handler: Optional[Callable[[Sequence[Item]], None]] = None,
     ):
         self.accept_handler = accept_handler
-        self.control = VertMenuUIControl(
-            items,
+        # Called instead of accept_handler in multi-select mode:
+        self.accept_marked_handler = accept_marked_handler
+        stream = is_stream(items)
+        self.control = self._init_control(
+            () if stream else cast(Iterable[Item], items),
             focusable=focusable,
             key_bindings=self._init_key_bindings(),
             selected_handler=selected_handler,
+            max_width=max_width,
+            stats=stats,
+            handler_delay=handler_delay,
+            multiselect=multiselect,
         )
-        self.max_width = max_width
         self.window = Window(
             self.control, width=self.preferred_width, style=self.get_style
         )
         self.focus_window: Container = self.window
-        if selected_item is not None:
+        if stream:
+            self.control._pending_item = selected_item
+            self.control.stream = ItemStream(items, self.control.append_items)
+            self.control.stream.start()
+        elif selected_item is not None:
             self.control.selected_item = selected_item
 
+    def _init_control(self, items: Iterable[Item], **kwargs: Any) -> VertMenuUIControl:
+        return VertMenuUIControl(items, **kwargs)
+
     def _init_key_bindings(self) -> KeyBindings:
         kb = KeyBindings()
 
@@ -79,6 +97,25 @@ class VertMenu:
         def _enter(event: E) -> None:
             self.handle_accept()
 
+        multiselect = Condition(lambda: self.control.multiselect)
+
+        @kb.add("c-space", filter=multiselect)
+        def _mark(event: E) -> None:
+            self.control.toggle_mark()
+            self.control.go_relative(1)
+
+        @kb.add("escape", "a", filter=multiselect)
+        def _mark_all(event: E) -> None:
+            self.control.mark_all()
+
+        @kb.add("escape", "d", filter=multiselect)
+        def _unmark_all(event: E) -> None:
+            self.control.unmark_all()
+
+        @kb.add("escape", "t", filter=multiselect)
+        def _invert_marks(event: E) -> None:
+            self.control.invert_marks()
+
         return kb
 
     def get_style(self) -> str:
@@ -91,9 +128,20 @@ class VertMenu:
         self.control.handle_selected()
 
     def handle_accept(self) -> None:
+        if self.control.multiselect and self.accept_marked_handler is not None:
+            self.accept_marked_handler(self.accepted_items)
+            return
         if self.accept_handler is not None and self.control.selected_item is not None:
             self.accept_handler(self.control.selected_item)
 
+    @property
+    def max_width(self) -> Optional[int]:
+        return self.control.max_width
+
+    @max_width.setter
+    def max_width(self, max_width: Optional[int]) -> None:
+        self.control.max_width = max_width
+
     def preferred_width(self) -> int:
         width = self.control.preferred_width(0)
         assert width
@@ -102,12 +150,35 @@ class VertMenu:
         return width
 
     @property
-    def items(self) -> Tuple[Item, ...]:
+    def items(self) -> Sequence[Item]:
         return self.control.items
 
     @items.setter
     def items(self, items: Iterable[Item]) -> None:
-        self.control.items = tuple(items)
+        if self.control.stream is not None:
+            self.control.stream.cancel()
+            self.control.stream = None
+        self.control.items = items
+
+    @property
+    def multiselect(self) -> bool:
+        return self.control.multiselect
+
+    @multiselect.setter
+    def multiselect(self, multiselect: bool) -> None:
+        self.control.multiselect = multiselect
+
+    @property
+    def marked_items(self) -> Sequence[Item]:
+        return self.control.marked_items
+
+    @property
+    def accepted_items(self) -> Sequence[Item]:
+        """The marked items or, if there are none, the selected one"""
+        marked = self.control.marked_items
+        if not marked and self.control.selected_item is not None:
+            return [self.control.selected_item]
+        return marked
 
     @property
     def selected(self) -> Optional[int]:
@@ -126,14 +197,11 @@ class VertMenu:
         self.control.selected_item = item
 
     @property
-    def selected_handler(self) -> Optional[Callable[[Optional[Item], int], None]]:
+    def selected_handler(self) -> Optional[SelectedHandler]:
         return self.control.selected_handler
 
     @selected_handler.setter
-    def selected_handler(
-        self,
-        selected_handler: Optional[Callable[[Optional[Item], Optional[int]], None]],
-    ) -> None:
+    def selected_handler(self, selected_handler: Optional[SelectedHandler]) -> None:
         self.control.selected_handler = selected_handler
 
     def __pt_container__(self) -> Container:
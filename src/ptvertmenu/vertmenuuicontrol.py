@@ -1,14 +1,21 @@
 """Vertical menu widget for prompt-toolkit"""
 
+import asyncio
+import inspect
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import accumulate
 from typing import (
     TYPE_CHECKING,
-    Any,
     Callable,
     Dict,
+    Hashable,
     Iterable,
-    Iterator,
+    List,
     NewType,
     Optional,
+    Sequence,
     Tuple,
     cast,
 )
@@ -25,79 +32,411 @@ from prompt_toolkit.formatted_text import (
 from prompt_toolkit.key_binding.key_bindings import KeyBindingsBase
 from prompt_toolkit.layout.controls import GetLinePrefixCallable, UIContent, UIControl
 from prompt_toolkit.mouse_events import MouseEvent, MouseEventType
+from prompt_toolkit.utils import get_cwidth
+
+from .bitset import Bitset
+from .itemstore import Item as Item
+from .itemstore import (
+    ItemStore,
+    ItemView,
+    MarkedItems,
+    ReadOnlyItems,
+    item_sequence,
+)
+from .stats import Stats, measure
 
 if TYPE_CHECKING:
     from prompt_toolkit.key_binding.key_bindings import NotImplementedOrNone
 
-Item = Tuple[AnyFormattedText, Any]
+    from .itemstream import ItemStream
+
 Index = NewType("Index", int)
+# Called with the selected item and its index; can be a coroutine
+# function if the menu has a handler_delay:
+SelectedHandler = Callable[[Optional[Item], Optional[int]], object]
+
+# Shown before the items in multi-select mode:
+MARK = "● "
+NO_MARK = "  "
+
+
+def label_text(label: AnyFormattedText) -> str:
+    if isinstance(label, str):
+        return label
+    return to_plain_text(label)
+
+
+def text_width(text: str) -> int:
+    """Display width of a line of text"""
+    if text.isascii():
+        return len(text)
+    return get_cwidth(text)
+
+
+def label_metrics(text: str) -> Tuple[int, int]:
+    """Number of lines and display width of the plain text of a label"""
+    if "\n" not in text:
+        return 1, text_width(text)
+    lines = text.split("\n")
+    return len(lines), max(map(text_width, lines))
+
+
+def _identity(item: Item) -> Tuple[int, int]:
+    # Item stores create the item tuples on access, so only the label
+    # and the value they keep have a lasting identity:
+    return id(item[0]), id(item[1])
+
+
+def highlight(
+    fragments: StyleAndTextTuples,
+    positions: Sequence[int],
+    style: str = "class:vertmenu.match",
+) -> StyleAndTextTuples:
+    """Add style to the characters at the sorted positions of the plain
+    text of fragments"""
+    result: StyleAndTextTuples = []
+    offset = 0
+    i = 0
+    for frag in fragments:
+        fstyle, text = frag[0], frag[1]
+        if "[ZeroWidthEscape]" in fstyle:
+            # Not part of the plain text
+            result.append(frag)
+            continue
+        end = offset + len(text)
+        if i >= len(positions) or positions[i] >= end:
+            result.append(frag)
+            offset = end
+            continue
+        matchstyle = fstyle + " " + style if fstyle else style
+        start = 0
+        while i < len(positions) and positions[i] < end:
+            # Highlight each run of consecutive positions at once:
+            first = positions[i] - offset
+            last = first + 1
+            i += 1
+            while i < len(positions) and positions[i] - offset == last < len(text):
+                last += 1
+                i += 1
+            if first > start:
+                result.append((fstyle, text[start:first]))
+            result.append((matchstyle, text[first:last]))
+            start = last
+        if start < len(text):
+            result.append((fstyle, text[start:]))
+        offset = end
+    return result
+
+
+def _style_lines(
+    lines: Iterable[StyleAndTextTuples], style: str
+) -> List[StyleAndTextTuples]:
+    return [
+        [(frag[0] + " " + style if frag[0] else style, frag[1]) for frag in line]
+        for line in lines
+    ]
 
 
 class VertMenuUIControl(UIControl):
     """UIControl optimized for VertMenu"""
 
+    # Maximum number of items with rendered lines in the cache:
+    line_cache_size = 1000
+
     def __init__(
         self,
         items: Iterable[Item],
         focusable: FilterOrBool = True,
         key_bindings: Optional[KeyBindingsBase] = None,
-        selected_handler: Optional[
-            Callable[[Optional[Item], Optional[int]], None]
-        ] = None,
+        selected_handler: Optional[SelectedHandler] = None,
+        max_width: Optional[int] = None,
+        stats: Optional[Stats] = None,
+        handler_delay: Optional[float] = None,
+        multiselect: bool = False,
     ):
-        self._items = tuple(items)
+        self._items: Sequence[Item] = item_sequence(items)
         self._selected: Optional[Index] = Index(0)
         self.focusable = to_filter(focusable)
         self.key_bindings = key_bindings
         self.selected_handler = selected_handler
+        # None calls the handler right away on every selection change;
+        # otherwise it's called in a task, only for the selection that
+        # lasts handler_delay seconds:
+        self.handler_delay = handler_delay
+        self._handler_task: Optional[asyncio.Task[None]] = None
+        # Dispatch the handler on the first render, for the initial
+        # selection or if there was no event loop running when the
+        # selection changed:
+        self._handler_pending = selected_handler is not None
+        self.stats = stats
+        # Marked items, by their position in the base items of a view,
+        # so that the marks are kept when the view changes:
+        self.multiselect = multiselect
+        self._marks = Bitset()
+        # Returns the positions of the label of an item to highlight:
+        self.highlighter: Optional[Callable[[int], Optional[Sequence[int]]]] = None
+        # We stop measuring labels when we get to this width:
+        self.max_width = max_width
         self._width = 30
         # Mark if the last movement we did was down:
         self._moved_down = False
         # ^ We use this to show the complete label of the item at the
         # bottom of the screen when it's the selected one.
-        self._lineno_to_index: Dict[int, Index] = {}
-        self._index_to_lineno: Dict[Index, int] = {}
+        # Number of the first line of each item, or None when all items
+        # have a single line and the mapping is the identity:
+        self._offsets: Optional["array[int]"] = None
+        self._line_count = 0
+        # The mappings and the width are computed when first needed,
+        # usually by the first render:
+        self._mapped = False
+        # LRU with the unselected and selected styled lines of each item:
+        self._line_cache: OrderedDict[
+            Index, Tuple[List[StyleAndTextTuples], List[StyleAndTextTuples]]
+        ] = OrderedDict()
         self._gen_lineno_mappings()
-        self.handle_selected()
+        # Position of the first occurrence of each item, built on demand;
+        # unhashable items are looked up by the identity of their label
+        # and value:
+        self._item_index: Optional[Dict[Hashable, Index]] = None
+        self._identity_index: Dict[Tuple[int, int], Index] = {}
+        # Source of items still being streamed in, started on the first
+        # render if there was no event loop running before that:
+        self.stream: Optional["ItemStream"] = None
+        # Item to select as soon as it's streamed in:
+        self._pending_item: Optional[Item] = None
 
     def handle_selected(self) -> None:
-        if self.selected_handler is not None:
-            self.selected_handler(self.selected_item, self.selected)
-
-    def _items_enumerate(self) -> Iterator[Tuple[Index, Item]]:
-        for index, item in enumerate(self._items):
-            yield Index(index), item
-
-    def _gen_lineno_mappings(self) -> None:
-        # Create the lineno <-> item mappings:
-        self._lineno_to_index.clear()
-        self._index_to_lineno.clear()
-        lineno = 0
+        if self.selected_handler is None:
+            return
+        if self.handler_delay is None:
+            self._handler_pending = False
+            with measure(self.stats, "handler"):
+                self.selected_handler(self.selected_item, self.selected)
+            return
+        # A new selection supersedes the one waiting to be handled, and
+        # cancels the handler that is still running:
+        if self._handler_task is not None:
+            self._handler_task.cancel()
+            self._handler_task = None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._handler_pending = True
+            return
+        self._handler_pending = False
+        self._handler_task = loop.create_task(
+            self._dispatch_selected(self.selected_item, self.selected)
+        )
+
+    async def _dispatch_selected(
+        self, item: Optional[Item], index: Optional[int]
+    ) -> None:
+        await asyncio.sleep(self.handler_delay or 0)
+        handler = self.selected_handler
+        if handler is None:
+            return
+        with measure(self.stats, "handler"):
+            result = handler(item, index)
+            if inspect.isawaitable(result):
+                await result
+
+    def _extend_item_index(self, start: int) -> None:
+        item_index = self._item_index
+        if item_index is None:
+            return
+        identity_index = self._identity_index
+        for index in range(start, len(self._items)):
+            item = self._items[index]
+            try:
+                item_index.setdefault(item, Index(index))
+            except TypeError:
+                identity_index.setdefault(_identity(item), Index(index))
+
+    def _index_of(self, item: Item) -> Optional[Index]:
+        if self._item_index is None:
+            items = self._items
+            try:
+                # Iterate backwards so that the first occurrence wins:
+                self._item_index = dict(
+                    zip(reversed(items), map(Index, range(len(items) - 1, -1, -1)))
+                )
+            except TypeError:
+                self._item_index = {}
+                self._extend_item_index(0)
+        try:
+            return self._item_index.get(item)
+        except TypeError:
+            pass
+        index = self._identity_index.get(_identity(item))
+        if index is None and isinstance(self._items, (ItemStore, ItemView)):
+            # The items are created on access, so identities don't last:
+            for i, candidate in enumerate(self._items):
+                if candidate == item:
+                    return Index(i)
+        return index
+
+    def _gen_lineno_mappings(
+        self,
+        lines: Optional[Sequence[int]] = None,
+        widths: Optional[Sequence[int]] = None,
+    ) -> None:
+        # Create the lineno <-> item mappings, right away only if we got
+        # the line counts and widths of the labels:
+        self._line_cache.clear()
         self._width = 30
-        for index, item in self._items_enumerate():
-            self._index_to_lineno[Index(index)] = lineno
-            for formatted_line in split_lines(to_formatted_text(item[0])):
-                line = to_plain_text(formatted_line)
-                self._lineno_to_index[lineno] = index
-                lineno += 1
-                self._width = max(self._width, len(line))
+        self._offsets = None
+        self._line_count = 0
+        self._mapped = lines is not None and widths is not None
+        if self._mapped:
+            self._extend_lineno_mappings(0, lines, widths)
+
+    def _ensure_mappings(self) -> None:
+        if not self._mapped:
+            self._mapped = True
+            self._extend_lineno_mappings(0)
+
+    def _width_done(self) -> bool:
+        return self.max_width is not None and self._width >= self.max_width
+
+    def _extend_lineno_mappings(
+        self,
+        start: int,
+        lines: Optional[Sequence[int]] = None,
+        widths: Optional[Sequence[int]] = None,
+    ) -> None:
+        # Extend the mappings with the items from start onwards, using
+        # the line counts and widths of the labels if we got them:
+        if not self._mapped:
+            # They'll be computed for all items when needed
+            return
+        with measure(self.stats, "mappings"):
+            self._extend_offsets(start, lines, widths)
+
+    def _extend_offsets(
+        self,
+        start: int,
+        lines: Optional[Sequence[int]],
+        widths: Optional[Sequence[int]],
+    ) -> None:
+        if lines is None or widths is None:
+            lines, widths = self._label_metrics(start, len(self._items))
+        if not self._width_done() and widths:
+            self._width = max(self._width, max(widths))
+        if self._offsets is None and max(lines, default=1) == 1:
+            self._line_count += len(lines)
+            return
+        if self._offsets is None:
+            self._offsets = array("I", range(start))
+        offsets = list(accumulate(lines, initial=self._line_count))
+        self._line_count = offsets.pop()
+        self._offsets.extend(offsets)
+
+    def _label_metrics(
+        self, start: int, stop: int
+    ) -> Tuple[Sequence[int], Sequence[int]]:
+        """Number of lines and display width of the labels of the items
+        from start to stop; the widths are left out if we don't need
+        them anymore"""
+        texts = [label_text(item[0]) for item in self._items[start:stop]]
+        if self._width_done():
+            return [text.count("\n") + 1 for text in texts], ()
+        metrics = [label_metrics(text) for text in texts]
+        return [metric[0] for metric in metrics], [metric[1] for metric in metrics]
+
+    def _splice_offsets(
+        self,
+        start: int,
+        stop: int,
+        count: int,
+        lines: Sequence[int],
+        widths: Sequence[int],
+    ) -> None:
+        # The items from start to stop were replaced by count items with
+        # the given line counts and widths:
+        if not self._width_done() and widths:
+            self._width = max(self._width, max(widths))
+        if self._offsets is None and max(lines, default=1) == 1:
+            self._line_count += count - (stop - start)
+            return
+        if self._offsets is None:
+            self._offsets = array("I", range(len(self._items) - count + stop - start))
+        offsets = self._offsets
+        first = offsets[start] if start < len(offsets) else self._line_count
+        end = offsets[stop] if stop < len(offsets) else self._line_count
+        new = list(accumulate(lines, initial=first))
+        shift = new.pop() - end
+        tail = offsets[stop:]
+        if shift:
+            tail = array("I", map(shift.__add__, tail))
+        offsets[start:] = array("I", new) + tail
+        self._line_count += shift
+
+    def _line_to_index(self, lineno: int) -> Index:
+        self._ensure_mappings()
+        if not 0 <= lineno < self._line_count:
+            raise KeyError(lineno)
+        if self._offsets is None:
+            return Index(lineno)
+        return Index(bisect_right(self._offsets, lineno) - 1)
+
+    def _index_to_line(self, index: Index) -> int:
+        self._ensure_mappings()
+        if self._offsets is None:
+            return index
+        return self._offsets[index]
+
+    def _index_to_last_line(self, index: Index) -> int:
+        self._ensure_mappings()
+        if self._offsets is None:
+            return index
+        if index + 1 < len(self._offsets):
+            return self._offsets[index + 1] - 1
+        return self._line_count - 1
 
     @property
-    def items(self) -> Tuple[Item, ...]:
-        return self._items
+    def items(self) -> Sequence[Item]:
+        return ReadOnlyItems(self._items)
 
     @items.setter
     def items(self, items: Iterable[Item]) -> None:
+        self.set_items(items)
+
+    def set_items(
+        self,
+        items: Iterable[Item],
+        selected: Optional[int] = None,
+        lines: Optional[Sequence[int]] = None,
+        widths: Optional[Sequence[int]] = None,
+    ) -> None:
+        """Replace the items, keeping the selected item if possible
+
+        The caller can provide the position to select in the new items,
+        which skips looking up the previously selected one, and the
+        number of lines and the width of each label.
+        """
         previous = None
         if self._items and self._selected is not None:
             previous = self._items[self._selected]
-        self._items = tuple(items)
+        # The marks are kept only for another view of the same items:
+        base = items.base if isinstance(items, ItemView) else items
+        if self._marks and self._marks_base() is not base:
+            self._marks.clear()
+        self._items = item_sequence(items)
         if self._items:
             self._selected = Index(0)
         else:
             self._selected = None
         self._moved_down = False
-        self._gen_lineno_mappings()
+        self._gen_lineno_mappings(lines, widths)
+        self._item_index = None
+        self._identity_index.clear()
+        if selected is not None and self._items:
+            self._selected = Index(selected)
+            # Item stores create a new tuple on each access:
+            item = self._items[selected]
+            if previous is None or (item is not previous and item != previous):
+                self.handle_selected()
+            return
         if previous is None:
             self.handle_selected()
             return
@@ -108,6 +447,135 @@ class VertMenuUIControl(UIControl):
             # Not possible, let's just handle the current item:
             self.handle_selected()
 
+    def append_items(
+        self,
+        items: Iterable[Item],
+        lines: Optional[Sequence[int]] = None,
+        widths: Optional[Sequence[int]] = None,
+    ) -> None:
+        """Add items to the end of the menu, keeping the selection"""
+        start = len(self._items)
+        current = self._items
+        if (
+            isinstance(current, ItemView)
+            and isinstance(items, ItemView)
+            and items.base is current.base
+        ):
+            current.extend(items.indices)
+        elif isinstance(current, (list, ItemStore)):
+            current.extend(items)
+        else:
+            items_list = list(current)
+            items_list.extend(items)
+            self._items = items_list
+        if len(self._items) == start:
+            return
+        self._extend_lineno_mappings(start, lines, widths)
+        self._extend_item_index(start)
+        pending = self._pending_item
+        if pending is not None:
+            for index in range(start, len(self._items)):
+                if self._items[index] == pending:
+                    self._pending_item = None
+                    self.selected = index
+                    return
+        if start == 0:
+            self._selected = Index(0)
+            self.handle_selected()
+
+    def splice_items(self, start: int, stop: int, items: Iterable[Item]) -> None:
+        """Replace the items from start to stop with items
+
+        Only the new items are measured. If the selected item is
+        replaced, the one before the replaced ones gets selected;
+        otherwise the selection stays on the same item.
+        """
+        current = self._items
+        if not isinstance(current, list):
+            if self._marks and isinstance(current, ItemView):
+                # The marks go from the positions in the base to the
+                # positions in the list:
+                self._marks = Bitset(
+                    i
+                    for i, position in enumerate(current.indices)
+                    if position in self._marks
+                )
+            current = self._items = list(current)
+        previous_len = len(current)
+        new = list(items)
+        if self._marks:
+            self._marks.splice(start, stop, len(new))
+        current[start:stop] = new
+        self._line_cache.clear()
+        self._item_index = None
+        self._identity_index.clear()
+        if self._mapped:
+            with measure(self.stats, "mappings"):
+                lines, widths = self._label_metrics(start, start + len(new))
+                self._splice_offsets(start, stop, len(new), lines, widths)
+        selected = self._selected
+        if not current:
+            if selected is None:
+                return
+            self._selected = None
+        elif previous_len == 0:
+            self._selected = Index(0)
+        elif selected is None:
+            return
+        elif selected >= stop:
+            self._selected = Index(selected + len(new) - (stop - start))
+            return
+        elif selected >= start:
+            self._selected = Index(max(0, start - 1))
+            self._moved_down = False
+        else:
+            return
+        self.handle_selected()
+
+    def _marks_base(self) -> Sequence[Item]:
+        """Items whose positions the marks refer to"""
+        items = self._items
+        if isinstance(items, ItemView):
+            return items.base
+        return items
+
+    def _view_positions(self) -> Sequence[int]:
+        """Positions in the base of the items shown"""
+        items = self._items
+        if isinstance(items, ItemView):
+            return items.indices
+        return range(len(items))
+
+    def is_marked(self, index: int) -> bool:
+        return self._view_positions()[index] in self._marks
+
+    def toggle_mark(self, index: Optional[int] = None) -> None:
+        """Mark or unmark the item at index, or the selected one"""
+        if index is None:
+            index = self.selected
+            if index is None:
+                return
+        self._marks.toggle(self._view_positions()[index])
+
+    def mark_all(self) -> None:
+        """Mark all the items shown"""
+        self._marks.update(self._view_positions())
+
+    def unmark_all(self) -> None:
+        """Unmark all the items shown"""
+        self._marks.difference_update(self._view_positions())
+
+    def invert_marks(self) -> None:
+        """Mark the items shown that are not marked, and unmark the
+        others"""
+        self._marks.symmetric_difference_update(self._view_positions())
+
+    @property
+    def marked_items(self) -> Sequence[Item]:
+        """The marked items, in the order of the base items, including
+        the ones that are not shown"""
+        return MarkedItems(self._marks_base(), self._marks)
+
     @property
     def selected(self) -> Optional[int]:
         if self._selected is None or not self._items:
@@ -139,13 +607,15 @@ class VertMenuUIControl(UIControl):
         if item is None:
             self._selected = None
             return
-        for index, current in self._items_enumerate():
-            if current == item:
-                self._selected = index
-                return
-        raise IndexError
+        index = self._index_of(item)
+        if index is None:
+            raise IndexError
+        self._selected = index
 
     def preferred_width(self, max_available_width: int) -> Optional[int]:
+        self._ensure_mappings()
+        if self.multiselect:
+            return self._width + len(MARK)
         return self._width
 
     def preferred_height(
@@ -155,21 +625,59 @@ class VertMenuUIControl(UIControl):
         wrap_lines: bool,
         get_line_prefix: Optional[GetLinePrefixCallable],
     ) -> Optional[int]:
-        return len(self._lineno_to_index)
+        self._ensure_mappings()
+        return self._line_count
 
     def is_focusable(self) -> bool:
         return self.focusable()
 
+    def _item_fragments(self, index: Index) -> StyleAndTextTuples:
+        """Formatted text of the item at index, as rendered"""
+        fragments: StyleAndTextTuples = to_formatted_text(self._items[index][0])
+        if self.highlighter is not None:
+            positions = self.highlighter(index)
+            if positions:
+                fragments = highlight(fragments, positions)
+        return fragments
+
+    def _item_lines(
+        self, index: Index
+    ) -> Tuple[List[StyleAndTextTuples], List[StyleAndTextTuples]]:
+        cache = self._line_cache
+        lines = cache.get(index)
+        if lines is not None:
+            cache.move_to_end(index)
+            return lines
+        itemlines = list(split_lines(self._item_fragments(index)))
+        lines = (
+            _style_lines(itemlines, "class:vertmenu.item"),
+            _style_lines(itemlines, "class:vertmenu.selected"),
+        )
+        cache[index] = lines
+        if len(cache) > self.line_cache_size:
+            cache.popitem(last=False)
+        return lines
+
+    def clear_line_cache(self) -> None:
+        """Render the lines of the items again, after something that
+        affects their style changes"""
+        self._line_cache.clear()
+
     def _get_line(self, lineno: int) -> StyleAndTextTuples:
-        index = self._lineno_to_index[lineno]
-        item = self._items[index]
-        itemlines = list(split_lines(to_formatted_text(item[0])))
-        line = itemlines[lineno - self._index_to_lineno[index]]
-        if self.selected_item == item:
-            style = "class:vertmenu.selected"
-        else:
-            style = "class:vertmenu.item"
-        return [(frag[0] + " " + style if frag[0] else style, frag[1]) for frag in line]
+        index = self._line_to_index(lineno)
+        selected = index == self._selected
+        lines = self._item_lines(index)[selected]
+        offset = lineno - self._index_to_line(index)
+        if not self.multiselect:
+            return lines[offset]
+        # The marks change too often to be in the cached lines:
+        style = "class:vertmenu.selected" if selected else "class:vertmenu.item"
+        mark = MARK if offset == 0 and self.is_marked(index) else NO_MARK
+        return [(style + " class:vertmenu.mark", mark)] + lines[offset]
+
+    def _get_line_measured(self, lineno: int) -> StyleAndTextTuples:
+        with measure(self.stats, "get_line"):
+            return self._get_line(lineno)
 
     def _cursor_position(self) -> Point:
         item = self.selected_item
@@ -177,29 +685,36 @@ class VertMenuUIControl(UIControl):
             return Point(x=0, y=0)
         if self._selected is None:
             return Point(x=0, y=0)
-        lineno = self._index_to_lineno[self._selected]
         if self._moved_down:
             # Put the cursor in the last line of a multi-line item if
             # we have moved down to show the full label if it is at
             # the bottom of the screen:
-            while self._lineno_to_index.get(lineno + 1) == self.selected:
-                lineno += 1
-        return Point(x=0, y=lineno)
+            return Point(x=0, y=self._index_to_last_line(self._selected))
+        return Point(x=0, y=self._index_to_line(self._selected))
 
     def create_content(self, width: int, height: int) -> UIContent:
-        return UIContent(
-            get_line=self._get_line,
-            line_count=len(self._lineno_to_index),
-            show_cursor=False,
-            cursor_position=self._cursor_position(),
-        )
+        with measure(self.stats, "create_content"):
+            if self.stream is not None:
+                self.stream.start()
+            if self._handler_pending:
+                self.handle_selected()
+            self._ensure_mappings()
+            return UIContent(
+                get_line=(
+                    self._get_line if self.stats is None else self._get_line_measured
+                ),
+                line_count=self._line_count,
+                show_cursor=False,
+                cursor_position=self._cursor_position(),
+            )
 
     def mouse_handler(self, mouse_event: MouseEvent) -> "NotImplementedOrNone":
         if mouse_event.event_type != MouseEventType.MOUSE_DOWN:
             return NotImplemented
-        index = self._lineno_to_index.get(mouse_event.position.y)
-        if index is not None:
-            self.selected = index
+        try:
+            self.selected = self._line_to_index(mouse_event.position.y)
+        except KeyError:
+            pass
         return None
 
     def move_cursor_down(self) -> None:
@@ -227,7 +742,7 @@ class VertMenuUIControl(UIControl):
         if not self._items:
             self._selected = None
             return
-        self.selected = len(self.items) - 1
+        self.selected = len(self._items) - 1
 
     def go_relative(self, positions: int) -> None:
         if not self._items:
@@ -0,0 +1,71 @@
+"""bitset tests"""
+
+import unittest
+from typing import List, Set
+
+from ptvertmenu.bitset import Bitset
+from ptvertmenu.itemstore import MarkedItems
+from ptvertmenu.vertmenu import Item
+
+
+class TestBitset(unittest.TestCase):
+    def check(self, bitset: Bitset, expected: Set[int]) -> None:
+        self.assertEqual(list(bitset), sorted(expected))
+        self.assertEqual(len(bitset), len(expected))
+        self.assertEqual(bool(bitset), bool(expected))
+
+    def test_single(self) -> None:
+        bitset = Bitset([3, 10])
+        self.assertIn(3, bitset)
+        self.assertNotIn(4, bitset)
+        self.assertNotIn(1000, bitset)
+        bitset.add(17)
+        bitset.discard(3)
+        bitset.discard(1000)
+        bitset.toggle(10)
+        bitset.toggle(11)
+        self.check(bitset, {11, 17})
+        bitset.clear()
+        self.check(bitset, set())
+
+    def test_bulk(self) -> None:
+        for positions in (range(5, 300), range(5, 10), [1, 4, 200]):
+            bitset = Bitset(range(0, 400, 3))
+            expected = set(range(0, 400, 3))
+            bitset.update(positions)
+            expected.update(positions)
+            self.check(bitset, expected)
+            bitset.symmetric_difference_update(positions)
+            expected.symmetric_difference_update(positions)
+            self.check(bitset, expected)
+            bitset.update(positions)
+            bitset.difference_update(positions)
+            expected.difference_update(positions)
+            self.check(bitset, expected)
+
+    def test_splice(self) -> None:
+        bitset = Bitset([0, 5, 6, 9, 100])
+        bitset.splice(5, 7, 3)
+        self.check(bitset, {0, 10, 101})
+        bitset.splice(0, 0, 2)
+        self.check(bitset, {2, 12, 103})
+        bitset.splice(10, 200, 0)
+        self.check(bitset, {2})
+
+    def test_copy(self) -> None:
+        bitset = Bitset([1])
+        copy = bitset.copy()
+        bitset.add(2)
+        self.check(copy, {1})
+
+
+class TestMarkedItems(unittest.TestCase):
+    def test_items(self) -> None:
+        base: List[Item] = [(str(i), i) for i in range(10)]
+        marks = Bitset([2, 5, 7])
+        marked = MarkedItems(base, marks)
+        marks.add(0)
+        self.assertEqual(len(marked), 3)
+        self.assertEqual(list(marked), [base[2], base[5], base[7]])
+        self.assertEqual(marked[1], base[5])
+        self.assertEqual(list(marked[1:]), [base[5], base[7]])
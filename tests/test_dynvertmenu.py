@@ -0,0 +1,464 @@
+"""dynvertmenu tests"""
+
+import asyncio
+import unittest
+from typing import AsyncIterator, Iterator, List, Optional, Sequence
+
+from ptvertmenu.dynvertmenu import (
+    DynVertMenuBase,
+    FuzzFilterVertMenu,
+    FuzzRankVertMenu,
+    FuzzSearchVertMenu,
+    RegexFilterVertMenu,
+    RegexSearchVertMenu,
+    SearchState,
+)
+from ptvertmenu.itemstream import ItemStream, ThreadedItems
+from ptvertmenu.vertmenu import Item, VertMenu
+
+
+def make_items(labels: List[str]) -> List[Item]:
+    return [(label, label) for label in labels]
+
+
+class TestLabelStore(unittest.TestCase):
+    def test_formatted(self) -> None:
+        items: List[Item] = [
+            ([("bold", "Break"), ("", "fast")], 1),
+            ("Lunch", 2),
+        ]
+        menu = RegexFilterVertMenu(items)
+        self.assertEqual(menu._labels.plain, ["Breakfast", "Lunch"])
+        self.assertEqual(menu._labels.folded, ["breakfast", "lunch"])
+        menu.items = items[1:]
+        self.assertEqual(menu._labels.plain, ["Lunch"])
+
+
+class TestFilter(unittest.TestCase):
+    LABELS = ["Breakfast", "lunch", "dinner", "midnight snack"]
+
+    def setUp(self) -> None:
+        self.items = make_items(self.LABELS)
+
+    def test_regex(self) -> None:
+        menu = RegexFilterVertMenu(self.items)
+        menu.buffer.text = "^l.*h"
+        self.assertEqual(menu._vertmenu.items, (self.items[1],))
+        menu.buffer.text = "N"
+        self.assertEqual(menu._vertmenu.items, ())
+        # Invalid regexes keep the previous result:
+        menu.buffer.text = "n("
+        self.assertEqual(menu._vertmenu.items, ())
+        menu.buffer.text = ""
+        self.assertEqual(menu._vertmenu.items, tuple(self.items))
+
+    def test_fuzz(self) -> None:
+        menu = FuzzFilterVertMenu(self.items)
+        menu.buffer.text = "BF"
+        self.assertEqual(menu._vertmenu.items, (self.items[0],))
+        menu.buffer.text = "nn"
+        self.assertEqual(menu._vertmenu.items, tuple(self.items[2:]))
+
+
+class TestSearch(unittest.TestCase):
+    LABELS = ["Breakfast", "lunch", "dinner", "midnight snack"]
+
+    def setUp(self) -> None:
+        self.items = make_items(self.LABELS)
+
+    def test_regex(self) -> None:
+        menu = RegexSearchVertMenu(self.items)
+        menu.buffer.text = "er$"
+        self.assertEqual(menu.selected_item, self.items[2])
+        menu.buffer.text = "nothing"
+        self.assertEqual(menu.selected_item, self.items[2])
+
+    def test_fuzz(self) -> None:
+        menu = FuzzSearchVertMenu(self.items)
+        menu.buffer.text = "MS"
+        self.assertEqual(menu.selected_item, self.items[3])
+
+
+class TestNarrowing(unittest.TestCase):
+    LABELS = ["Breakfast", "lunch", "dinner", "midnight snack", "a\x01b"]
+
+    def setUp(self) -> None:
+        self.items = make_items(self.LABELS)
+        self.menu = RegexFilterVertMenu(self.items)
+
+    def type(self, text: str) -> None:
+        for i in range(len(text)):
+            self.menu.buffer.text = text[: i + 1]
+
+    def test_stack(self) -> None:
+        self.type("nn")
+        self.assertEqual([r[0] for r in self.menu._results], ["n", "nn"])
+        self.assertEqual(self.menu._vertmenu.items, (self.items[2],))
+        self.menu.buffer.text = "n"
+        self.assertEqual([r[0] for r in self.menu._results], ["n"])
+        self.assertEqual(self.menu._vertmenu.items, tuple(self.items[1:4]))
+        self.menu.buffer.text = "s"
+        self.assertEqual([r[0] for r in self.menu._results], ["s"])
+        self.assertEqual(self.menu._vertmenu.items, (self.items[0], self.items[3]))
+
+    def test_not_narrowing(self) -> None:
+        self.type("lunch|dinner")
+        self.assertEqual(self.menu._vertmenu.items, tuple(self.items[1:3]))
+        self.type("a\\0")
+        self.assertEqual(self.menu._vertmenu.items, ())
+        self.type("a\\01")
+        self.assertEqual(self.menu._vertmenu.items, (self.items[4],))
+
+    def test_items_reset(self) -> None:
+        self.type("lunch")
+        self.menu.items = make_items(["lunch box", "brunch"])
+        self.assertEqual(self.menu._vertmenu.items, (("lunch box", "lunch box"),))
+
+
+class TestFuzzRank(unittest.TestCase):
+    LABELS = ["some.file", "s-o-m-e", "some", "other"]
+
+    def setUp(self) -> None:
+        self.items = make_items(self.LABELS)
+
+    def test_rank(self) -> None:
+        menu = FuzzRankVertMenu(self.items)
+        menu.buffer.text = "SOME"
+        self.assertEqual(
+            menu._vertmenu.items, (self.items[2], self.items[0], self.items[1])
+        )
+        self.assertEqual(menu.selected_item, self.items[2])
+        menu.buffer.text = ""
+        self.assertEqual(menu._vertmenu.items, tuple(self.items))
+
+    def test_limit(self) -> None:
+        menu = FuzzRankVertMenu(self.items, limit=1)
+        menu.buffer.text = "s"
+        self.assertEqual(menu._vertmenu.items, (self.items[2],))
+
+
+class TestAsyncFilter(unittest.IsolatedAsyncioTestCase):
+    LABELS = ["Breakfast", "lunch", "dinner", "midnight snack"]
+
+    def setUp(self) -> None:
+        self.items = make_items(self.LABELS)
+
+    async def wait(self, menu: DynVertMenuBase) -> None:
+        assert menu._filter_task is not None
+        await menu._filter_task
+
+    async def test_filter(self) -> None:
+        menu = RegexFilterVertMenu(self.items, async_filter=True, chunk_size=1)
+        menu.buffer.text = "n"
+        # Nothing is filtered synchronously:
+        self.assertEqual(menu._vertmenu.items, tuple(self.items))
+        await self.wait(menu)
+        self.assertEqual(menu._vertmenu.items, tuple(self.items[1:]))
+        self.assertEqual(menu._status, "3 matches")
+
+    async def test_cancel(self) -> None:
+        menu = FuzzRankVertMenu(self.items, async_filter=True, debounce=0.01)
+        menu.buffer.text = "n"
+        first = menu._filter_task
+        menu.buffer.text = "nn"
+        assert first is not None
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        await self.wait(menu)
+        self.assertEqual(menu._vertmenu.items, (self.items[2], self.items[3]))
+        self.assertEqual([r[0] for r in menu._results], ["nn"])
+
+
+class TestStream(unittest.IsolatedAsyncioTestCase):
+    LABELS = ["Breakfast", "lunch", "dinner", "midnight snack"]
+
+    async def agen(self) -> AsyncIterator[Item]:
+        for label in self.LABELS:
+            await asyncio.sleep(0)
+            yield (label, label)
+
+    def gen(self) -> Iterator[Item]:
+        for label in self.LABELS:
+            yield (label, label)
+
+    async def wait(self, stream: Optional[ItemStream]) -> None:
+        assert stream is not None and stream._task is not None
+        await stream._task
+
+    async def test_vertmenu(self) -> None:
+        menu = VertMenu(self.agen(), selected_item=("dinner", "dinner"))
+        await self.wait(menu.control.stream)
+        self.assertEqual(menu.items, tuple(make_items(self.LABELS)))
+        self.assertEqual(menu.selected, 2)
+
+    async def test_filter(self) -> None:
+        menu = RegexFilterVertMenu(ThreadedItems(self.gen()))
+        menu.buffer.text = "n"
+        menu.buffer.text = "nn"
+        await self.wait(menu._stream)
+        self.assertEqual(menu.items, tuple(make_items(self.LABELS)))
+        self.assertEqual(menu._vertmenu.items, (("dinner", "dinner"),))
+        menu.buffer.text = "n"
+        self.assertEqual(menu._vertmenu.items, tuple(make_items(self.LABELS[1:])))
+
+    async def test_rank(self) -> None:
+        menu = FuzzRankVertMenu(self.agen())
+        assert menu._stream is not None
+        menu._stream.interval = 0
+        menu.buffer.text = "nn"
+        await self.wait(menu._stream)
+        self.assertEqual(
+            menu._vertmenu.items,
+            (("dinner", "dinner"), ("midnight snack", "midnight snack")),
+        )
+
+    async def test_status(self) -> None:
+        # Items that arrive after the filter is done update its count:
+        menu = RegexFilterVertMenu(make_items(self.LABELS), async_filter=True)
+        menu.buffer.text = "n"
+        assert menu._filter_task is not None
+        await menu._filter_task
+        self.assertEqual(menu._status, "3 matches")
+        menu._append_items(make_items(["noon", "tea"]))
+        self.assertEqual(len(menu._vertmenu.items), 4)
+        self.assertEqual(menu._status, "4 matches")
+
+    async def test_rank_selection(self) -> None:
+        async def agen() -> AsyncIterator[Item]:
+            for i in range(6):
+                await asyncio.sleep(0)
+                yield (f"nn{i}", i)
+
+        calls: List[Optional[Item]] = []
+        menu = FuzzRankVertMenu(
+            agen(), selected_handler=lambda item, index: calls.append(item)
+        )
+        assert menu._stream is not None
+        menu._stream.interval = 0
+        menu.buffer.text = "nn"
+        control = menu._vertmenu.control
+        while len(control._items) < 3:
+            await asyncio.sleep(0)
+        control.selected = 2
+        selected = control.selected_item
+        calls.clear()
+        await self.wait(menu._stream)
+        self.assertEqual(len(control._items), 6)
+        self.assertEqual(control.selected_item, selected)
+        self.assertEqual(calls, [])
+
+    def test_sync(self) -> None:
+        menu = RegexFilterVertMenu(self.gen())
+        self.assertIsNone(menu._stream)
+        self.assertEqual(menu._vertmenu.items, tuple(make_items(self.LABELS)))
+
+    async def test_iterator(self) -> None:
+        # Plain iterators are read up front even with an event loop:
+        menu = VertMenu(self.gen(), selected_item=("dinner", "dinner"))
+        self.assertIsNone(menu.control.stream)
+        self.assertEqual(menu.items, tuple(make_items(self.LABELS)))
+        self.assertEqual(menu.selected, 2)
+
+    async def test_error(self) -> None:
+        def broken() -> Iterator[Item]:
+            yield ("lunch", "lunch")
+            raise ValueError("broken source")
+
+        errors: List[BaseException] = []
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(
+            lambda loop, context: errors.append(context["exception"])
+        )
+        menu = VertMenu(ThreadedItems(broken()))
+        await self.wait(menu.control.stream)
+        self.assertEqual([str(e) for e in errors], ["broken source"])
+
+
+class TestKeepSelection(unittest.TestCase):
+    LABELS = ["Breakfast", "lunch", "dinner", "midnight snack"]
+
+    def test_filter(self) -> None:
+        items = make_items(self.LABELS)
+        menu = RegexFilterVertMenu(items)
+        menu.selected = 2
+        menu.buffer.text = "n"
+        self.assertEqual(menu.selected, 1)
+        self.assertEqual(menu.selected_item, items[2])
+        menu.buffer.text = "nn"
+        self.assertEqual(menu.selected_item, items[2])
+        menu.buffer.text = "u"
+        self.assertEqual(menu.selected_item, items[1])
+        menu.items = items[1:]
+        self.assertEqual(menu.selected_item, items[1])
+
+
+class TestWidth(unittest.TestCase):
+    def test_filter(self) -> None:
+        items = make_items(["a" * 40, "b" * 35, "c"])
+        menu = RegexFilterVertMenu(items)
+        self.assertEqual(menu._labels.widths.tolist(), [40, 35, 1])
+        self.assertEqual(menu._vertmenu.preferred_width(), 40)
+        menu.buffer.text = "b"
+        self.assertEqual(menu._vertmenu.preferred_width(), 35)
+        menu.buffer.text = "c"
+        self.assertEqual(menu._vertmenu.preferred_width(), 30)
+
+
+class TestSearchState(unittest.TestCase):
+    LABELS = ["ab", "b", "abc", "c", "a", "ba"]
+
+    def setUp(self) -> None:
+        self.tested: List[str] = []
+        self.state = SearchState("a", self.matcher, self.LABELS)
+
+    def matcher(self, label: str) -> bool:
+        self.tested.append(label)
+        return "a" in label
+
+    def test_next(self) -> None:
+        self.assertEqual(self.state.next(1), 2)
+        self.assertEqual(self.tested, ["b", "abc"])
+        self.assertEqual(self.state.next(3), 4)
+        self.assertEqual(self.state.next(5), 5)
+        # Wraps around:
+        self.assertEqual(self.state.next(6 % 6), 0)
+        self.assertEqual(self.state.next(1), 2)
+        # Nothing was tested twice:
+        self.assertEqual(sorted(self.tested), sorted(self.LABELS))
+
+    def test_previous(self) -> None:
+        self.assertEqual(self.state.previous(3), 2)
+        self.assertEqual(self.state.previous(1), 0)
+        self.assertEqual(self.state.previous(-1), 5)
+        self.assertEqual(self.state.previous(4), 4)
+        self.assertEqual(sorted(self.tested), sorted(self.LABELS))
+
+    def test_no_match(self) -> None:
+        state = SearchState("x", lambda label: False, self.LABELS)
+        self.assertIsNone(state.next(3))
+        self.assertIsNone(state.previous(3))
+
+    def test_narrow(self) -> None:
+        for index in range(len(self.LABELS)):
+            self.state.next(index)
+        tested: List[str] = []
+
+        def matcher(label: str) -> bool:
+            tested.append(label)
+            return "ab" in label
+
+        state = SearchState("ab", matcher, self.LABELS, self.state)
+        # Only the matches of the broader query are left to test:
+        self.assertEqual(state.tested, bytearray([0, 1, 0, 1, 0, 0]))
+        self.assertEqual(state.next(1), 2)
+        self.assertEqual(state.next(3), 0)
+        self.assertEqual(tested, ["abc", "a", "ba", "ab"])
+
+
+class TestSearchCycle(unittest.TestCase):
+    LABELS = ["Breakfast", "lunch", "dinner", "midnight snack"]
+
+    def test_cycle(self) -> None:
+        items = make_items(self.LABELS)
+        menu = RegexSearchVertMenu(items)
+        menu.buffer.text = "n"
+        self.assertEqual(menu.selected, 1)
+        menu.search_next()
+        self.assertEqual(menu.selected, 2)
+        menu.search_next()
+        self.assertEqual(menu.selected, 3)
+        menu.search_next()
+        self.assertEqual(menu.selected, 1)
+        menu.search_previous()
+        self.assertEqual(menu.selected, 3)
+        # Typing continues from the current item:
+        menu.buffer.text = "ni"
+        self.assertEqual(menu.selected, 3)
+        menu.buffer.text = "nis"
+        self.assertEqual(menu.selected, 3)
+        self.assertEqual(menu._status, "no match")
+
+    def test_handler(self) -> None:
+        calls: List[Optional[int]] = []
+        menu = FuzzSearchVertMenu(
+            make_items(self.LABELS),
+            selected_handler=lambda item, index: calls.append(index),
+        )
+        menu._vertmenu.control.create_content(10, 10)
+        menu.buffer.text = "DN"
+        self.assertEqual(calls, [0, 2])
+
+
+class TestMultiselect(unittest.TestCase):
+    LABELS = ["Breakfast", "lunch", "dinner", "midnight snack"]
+
+    def test_filtered_view(self) -> None:
+        accepted: List[Sequence[Item]] = []
+        items = make_items(self.LABELS)
+        menu = FuzzFilterVertMenu(
+            items, multiselect=True, accept_marked_handler=accepted.append
+        )
+        menu.handle_accept()
+        self.assertEqual(list(accepted[-1]), [items[0]])
+        menu.buffer.text = "nn"
+        menu._vertmenu.control.mark_all()
+        menu.buffer.text = ""
+        # The marks stay with the items:
+        self.assertEqual(list(menu.marked_items), [items[2], items[3]])
+        self.assertTrue(menu._vertmenu.control.is_marked(2))
+        menu._vertmenu.control.invert_marks()
+        menu.buffer.text = "n"
+        menu.handle_accept()
+        self.assertEqual(list(accepted[-1]), [items[0], items[1]])
+        menu.items = items
+        self.assertEqual(len(menu.marked_items), 0)
+
+
+class TestHighlight(unittest.TestCase):
+    LABELS = ["Breakfast", "lunch", "dinner", "Straße"]
+    MATCH = "class:vertmenu.match class:vertmenu.item"
+
+    def setUp(self) -> None:
+        self.items = make_items(self.LABELS)
+
+    def test_regex(self) -> None:
+        menu = RegexFilterVertMenu(self.items)
+        menu.buffer.text = "n.h"
+        content = menu._vertmenu.control.create_content(20, 10)
+        self.assertEqual(
+            content.get_line(0),
+            [
+                ("class:vertmenu.selected", "lu"),
+                (self.MATCH.replace("item", "selected"), "nch"),
+            ],
+        )
+        menu.buffer.text = ""
+        content = menu._vertmenu.control.create_content(20, 10)
+        self.assertEqual(content.get_line(0), [("class:vertmenu.item", "Breakfast")])
+
+    def test_fuzzy(self) -> None:
+        menu = FuzzRankVertMenu(self.items)
+        menu.buffer.text = "st"
+        control = menu._vertmenu.control
+        self.assertEqual(control.items, (self.items[3], self.items[0]))
+        content = control.create_content(20, 10)
+        # Casefolding changes the positions of "Straße", so it isn't highlighted:
+        self.assertEqual(len(content.get_line(0)), 1)
+        self.assertEqual(
+            content.get_line(1),
+            [("class:vertmenu.item", "Breakfa"), (self.MATCH, "st")],
+        )
+        # Only the rendered items were highlighted:
+        self.assertEqual(len(menu._positions_cache), 2)
+
+    def test_search(self) -> None:
+        menu = RegexSearchVertMenu(self.items)
+        menu.buffer.text = "n"
+        content = menu._vertmenu.control.create_content(20, 10)
+        self.assertEqual(content.get_line(2)[1], (self.MATCH, "n"))
+        menu.buffer.text = "ne"
+        content = menu._vertmenu.control.create_content(20, 10)
+        self.assertEqual(
+            content.get_line(2)[1],
+            ("class:vertmenu.match class:vertmenu.selected", "ne"),
+        )
@@ -0,0 +1,71 @@
+"""fuzzy tests"""
+
+import unittest
+from typing import List, Optional
+
+from ptvertmenu.fuzzy import fuzzy_matcher, fuzzy_rank, fuzzy_score
+
+
+class TestFuzzyMatcher(unittest.TestCase):
+    def test_match(self) -> None:
+        matcher = fuzzy_matcher("bft")
+        self.assertTrue(matcher("breakfast"))
+        self.assertFalse(matcher("lunch"))
+        self.assertFalse(matcher("tfb"))
+
+    def test_metachars(self) -> None:
+        matcher = fuzzy_matcher("a.*")
+        self.assertTrue(matcher("a.b*"))
+        self.assertFalse(matcher("abc"))
+
+    def test_empty(self) -> None:
+        self.assertTrue(fuzzy_matcher("")("anything"))
+
+
+class TestFuzzyScore(unittest.TestCase):
+    def score(self, pattern: str, text: str) -> int:
+        result = fuzzy_score(pattern, text)
+        assert result is not None
+        return result[0]
+
+    def test_no_match(self) -> None:
+        self.assertIsNone(fuzzy_score("xyz", "breakfast"))
+
+    def test_positions(self) -> None:
+        result = fuzzy_score("fa", "breakfast")
+        assert result is not None
+        self.assertEqual(result[1], [5, 6])
+        # The window is shrunk from the left:
+        result = fuzzy_score("ab", "a-a-ab")
+        assert result is not None
+        self.assertEqual(result[1], [4, 5])
+
+    def test_consecutive(self) -> None:
+        self.assertGreater(
+            self.score("lunch", "lunch"), self.score("lunch", "l-u-n-c-h")
+        )
+
+    def test_boundary(self) -> None:
+        self.assertGreater(self.score("b", "a b"), self.score("b", "ab"))
+        self.assertGreater(self.score("b", "aB"), self.score("b", "ab"))
+
+    def test_casefold_length(self) -> None:
+        # Positions refer to the casefolded text:
+        result = fuzzy_score("sse", "Straße")
+        assert result is not None
+        self.assertEqual(result[1], [4, 5, 6])
+
+
+class TestFuzzyRank(unittest.TestCase):
+    LABELS = ["a-b-c", "abc", "xabc", "abcd", "nothing"]
+
+    def rank(self, pattern: str, limit: Optional[int] = None) -> List[int]:
+        folded = [label.casefold() for label in self.LABELS]
+        return fuzzy_rank(pattern, range(len(folded)), self.LABELS, folded, limit)
+
+    def test_order(self) -> None:
+        # Shorter labels first, word boundaries beat consecutive matches:
+        self.assertEqual(self.rank("abc"), [1, 3, 0, 2])
+
+    def test_limit(self) -> None:
+        self.assertEqual(self.rank("abc", 2), [1, 3])
@@ -0,0 +1,104 @@
+"""itemstore tests"""
+
+import unittest
+from array import array
+from typing import List, Optional
+
+from ptvertmenu.dynvertmenu import FuzzFilterVertMenu, RegexFilterVertMenu
+from ptvertmenu.itemstore import Item, ItemStore, ItemView
+from ptvertmenu.vertmenu import VertMenu
+from ptvertmenu.vertmenuuicontrol import VertMenuUIControl
+
+
+class TestItemStore(unittest.TestCase):
+    def test_columns(self) -> None:
+        store = ItemStore([("a", 1), ("b", 2)])
+        store.append(("c", 3))
+        self.assertEqual(store.labels, ["a", "b", "c"])
+        self.assertEqual(store.values, [1, 2, 3])
+        self.assertEqual(store[1], ("b", 2))
+        self.assertEqual(store[1:], [("b", 2), ("c", 3)])
+        self.assertEqual(list(store), [("a", 1), ("b", 2), ("c", 3)])
+        other = ItemStore.from_columns(["d"], [4])
+        store.extend(other)
+        self.assertEqual(store[-1], ("d", 4))
+        with self.assertRaises(ValueError):
+            ItemStore.from_columns(["a"], [])
+
+    def test_view(self) -> None:
+        items: List[Item] = [("a", 1), ("b", 2), ("c", 3), ("d", 4)]
+        view = ItemView(items, range(2))
+        self.assertEqual(list(view), items[:2])
+        view.extend(range(2, 3))
+        self.assertEqual(view.indices, range(3))
+        view.extend([0])
+        self.assertEqual(view.indices, array("I", [0, 1, 2, 0]))
+        self.assertEqual(list(view[2:]), [items[2], items[0]])
+        self.assertIs(view[1], items[1])
+
+
+class TestMenus(unittest.TestCase):
+    LABELS = ["Breakfast", "lunch", "dinner", "midnight snack"]
+
+    def setUp(self) -> None:
+        self.store = ItemStore.from_columns(self.LABELS, range(len(self.LABELS)))
+
+    def test_filter(self) -> None:
+        calls: List[Optional[Item]] = []
+        menu = FuzzFilterVertMenu(
+            self.store, selected_handler=lambda item, index: calls.append(item)
+        )
+        self.assertIs(menu._all_items, self.store)
+        control = menu._vertmenu.control
+        control.create_content(10, 10)
+        menu.buffer.text = "nn"
+        self.assertIsInstance(control._items, ItemView)
+        self.assertEqual(menu._shown, array("I", [2, 3]))
+        self.assertEqual(control.items, (("dinner", 2), ("midnight snack", 3)))
+        control.selected = 1
+        menu.buffer.text = "n"
+        # Equal items are the same item, even if they are new tuples:
+        self.assertEqual(
+            calls, [("Breakfast", 0), ("dinner", 2), ("midnight snack", 3)]
+        )
+        self.assertEqual(menu.selected_item, ("midnight snack", 3))
+
+    def test_items_reset(self) -> None:
+        menu = RegexFilterVertMenu(self.store)
+        menu.selected = 2
+        menu.items = ItemStore.from_columns(["dinner", "supper"], [2, 5])
+        self.assertEqual(menu.selected_item, ("dinner", 2))
+
+    def test_unhashable_identity(self) -> None:
+        store = ItemStore([([("", f"l{i}")], i) for i in range(10)])
+        control = VertMenuUIControl(store)
+        # The item tuples are created on access and dropped, so their ids
+        # get reused and can't identify the items:
+        self.assertEqual(control._index_of(store[0]), 0)
+        for index in range(10):
+            control.selected_item = store[index]
+            self.assertEqual(control.selected, index)
+        control.items = ItemView(store, range(2, 10))
+        control.selected_item = store[9]
+        self.assertEqual(control.selected, 7)
+
+    def test_vertmenu_items(self) -> None:
+        menu = VertMenu([("a", 1)])
+        menu.items = self.store
+        self.assertIs(menu.control._items, self.store)
+
+    def test_items_view(self) -> None:
+        menu = FuzzFilterVertMenu(self.store)
+        items = menu.items
+        # A view of the store, not a copy:
+        self.assertIs(items._items, self.store)  # type: ignore[attr-defined]
+        self.assertEqual(items, tuple(self.store))
+        self.assertEqual(items[1:3], [("lunch", 1), ("dinner", 2)])
+        self.assertNotEqual(items, tuple(self.store)[:2])
+
+    def test_unhashable(self) -> None:
+        store = ItemStore.from_columns([[("", "a")], [("bold", "b")]], [1, 2])
+        menu = VertMenu(store)
+        self.assertIs(menu.control._items, store)
+        menu.selected_item = ([("bold", "b")], 2)
+        self.assertEqual(menu.selected, 1)
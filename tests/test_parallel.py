@@ -0,0 +1,62 @@
+"""parallel tests"""
+
+import unittest
+
+from ptvertmenu.dynvertmenu import (
+    FuzzFilterVertMenu,
+    RegexFilterVertMenu,
+    regex_matcher,
+)
+from ptvertmenu.fuzzy import fuzzy_matcher
+from ptvertmenu.parallel import ParallelFilter
+
+
+class TestParallelFilter(unittest.TestCase):
+    LABELS = [f"item {i} ção" for i in range(100)]
+    parallel: ParallelFilter
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.parallel = ParallelFilter(workers=3, threshold=10)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.parallel.close()
+
+    def test_regex(self) -> None:
+        found = self.parallel.filter(
+            regex_matcher, "7", self.LABELS, range(len(self.LABELS))
+        )
+        expected = [i for i, label in enumerate(self.LABELS) if "7" in label]
+        self.assertEqual(found, expected)
+
+    def test_candidates(self) -> None:
+        candidates = list(range(0, 100, 3))
+        found = self.parallel.filter(fuzzy_matcher, "1ç", self.LABELS, candidates)
+        expected = [i for i in candidates if "1" in str(i)]
+        self.assertEqual(found, expected)
+
+    def test_threshold(self) -> None:
+        self.assertIsNone(
+            self.parallel.filter(regex_matcher, "7", self.LABELS, range(5))
+        )
+
+    def test_reload(self) -> None:
+        labels = list(self.LABELS)
+        self.parallel.filter(regex_matcher, "1", labels, range(len(labels)))
+        labels.append("item 1000")
+        found = self.parallel.filter(regex_matcher, "100", labels, range(len(labels)))
+        self.assertEqual(found, [100])
+
+    def test_menus(self) -> None:
+        items = [(label, label) for label in self.LABELS]
+        menu = RegexFilterVertMenu(items, parallel=self.parallel)
+        menu.buffer.text = "9"
+        self.assertEqual(
+            menu._vertmenu.items, tuple(item for item in items if "9" in item[0])
+        )
+        menu.buffer.text = "99"
+        self.assertEqual(menu._vertmenu.items, (items[99],))
+        fuzz = FuzzFilterVertMenu(items, parallel=self.parallel)
+        fuzz.buffer.text = "I99Ç"
+        self.assertEqual(fuzz._vertmenu.items, (items[99],))
@@ -0,0 +1,105 @@
+"""preview tests"""
+
+import asyncio
+import unittest
+from typing import AsyncIterator, List, Optional
+
+from ptvertmenu.preview import PreviewPane
+from ptvertmenu.vertmenuuicontrol import Item
+
+
+class TestPreviewPane(unittest.IsolatedAsyncioTestCase):
+    async def wait(self, pane: PreviewPane) -> None:
+        task = pane._task
+        if task is not None:
+            await task
+
+    async def test_sync(self) -> None:
+        loaded: List[Item] = []
+
+        def loader(item: Item) -> str:
+            loaded.append(item)
+            return f"text of {item[1]}"
+
+        pane = PreviewPane(loader)
+        pane.selected_handler(("a", 1), 0)
+        await self.wait(pane)
+        self.assertEqual(pane.text, "text of 1")
+        pane.show(("b", 2))
+        await self.wait(pane)
+        pane.show(("a", 1))
+        self.assertEqual(pane.text, "text of 1")
+        self.assertEqual(loaded, [("a", 1), ("b", 2)])
+        pane.show(None)
+        self.assertEqual(pane.text, "")
+
+    async def test_stale(self) -> None:
+        cancelled: List[int] = []
+
+        async def loader(item: Item) -> str:
+            try:
+                await asyncio.sleep(item[1])
+            except asyncio.CancelledError:
+                cancelled.append(item[1])
+                raise
+            return str(item[1])
+
+        pane = PreviewPane(loader, loading_delay=0)
+        pane.show(("slow", 10))
+        await asyncio.sleep(0.01)
+        self.assertEqual(pane.text, "Loading...")
+        pane.show(("fast", 0))
+        await self.wait(pane)
+        await asyncio.sleep(0)
+        self.assertEqual(pane.text, "0")
+        self.assertEqual(cancelled, [10])
+
+    async def test_partial(self) -> None:
+        seen: List[str] = []
+        pane: Optional[PreviewPane] = None
+
+        async def loader(item: Item) -> AsyncIterator[str]:
+            for chunk in ["a", "b", "c"]:
+                assert pane is not None
+                seen.append(pane.text)
+                yield chunk
+
+        pane = PreviewPane(loader)
+        pane.show(("x", 1))
+        await self.wait(pane)
+        self.assertEqual(seen, ["", "a", "ab"])
+        self.assertEqual(pane.text, "abc")
+        self.assertEqual(pane._cache, {1: "abc"})
+
+    async def test_cache_size(self) -> None:
+        pane = PreviewPane(lambda item: str(item[1]) * 4, cache_size=10)
+        for value in range(4):
+            pane.show(("", value))
+            await self.wait(pane)
+        self.assertEqual(list(pane._cache), [2, 3])
+        self.assertEqual(pane._cached_chars, 8)
+
+    async def test_error(self) -> None:
+        def loader(item: Item) -> str:
+            raise OSError("nope")
+
+        pane = PreviewPane(loader)
+        pane.show(("", 1))
+        await self.wait(pane)
+        self.assertEqual(pane.text, "Error: nope")
+        self.assertEqual(pane._cache, {})
+
+
+class TestPreviewPanePending(unittest.TestCase):
+    def test_pending(self) -> None:
+        pane = PreviewPane(lambda item: "text")
+        pane.show(("a", 1))
+        self.assertEqual(pane._pending, ("a", 1))
+
+        async def render() -> None:
+            pane.control.create_content(10, 10)
+            assert pane._task is not None
+            await pane._task
+
+        asyncio.run(render())
+        self.assertEqual(pane.text, "text")
@@ -1,11 +1,12 @@
 """ptvertmenuuicontrol tests"""
 
+import asyncio
 import unittest
-from typing import List
+from typing import List, Optional, Tuple
 
 from prompt_toolkit.data_structures import Point
 from prompt_toolkit.mouse_events import MouseButton, MouseEvent, MouseEventType
-from ptvertmenu.vertmenuuicontrol import Item, VertMenuUIControl
+from ptvertmenu.vertmenuuicontrol import Index, Item, VertMenuUIControl, highlight
 
 
 def mouse_click(lineno: int) -> MouseEvent:
@@ -209,3 +210,340 @@ class TestVertMenuUIControlMultiLine(unittest.TestCase):
         for i in reversed(range(self.LINES * len(self.items))):
             self.control.mouse_handler(mouse_click(i))
             self.assertEqual(self.control.selected, i // self.LINES)
+
+
+class TestVertMenuUIControlMixed(unittest.TestCase):
+    def setUp(self) -> None:
+        self.items = [("a\nb", 0), ("c", 1), ("d\ne\nf", 2), ("g", 3)]
+        self.control = VertMenuUIControl(self.items)
+
+    def test_mapping(self) -> None:
+        self.assertEqual(self.control.preferred_height(999, 999, False, None), 7)
+        indexes = [self.control._line_to_index(i) for i in range(7)]
+        self.assertEqual(indexes, [0, 0, 1, 2, 2, 2, 3])
+        with self.assertRaises(KeyError):
+            self.control._line_to_index(7)
+        self.assertEqual(self.control._get_line(4), [("class:vertmenu.item", "e")])
+
+    def test_identity(self) -> None:
+        self.assertEqual(self.control.preferred_height(999, 999, False, None), 7)
+        self.assertIsNotNone(self.control._offsets)
+        self.control.items = [("a", 0), ("b", 1)]
+        self.assertIsNone(self.control._offsets)
+        self.assertEqual(self.control._line_to_index(1), 1)
+        self.assertEqual(self.control.preferred_height(999, 999, False, None), 2)
+
+    def test_cursor(self) -> None:
+        self.control.selected = 2
+        self.assertEqual(self.control._cursor_position().y, 5)
+        self.control.selected = 0
+        self.assertEqual(self.control._cursor_position().y, 0)
+
+
+class TestVertMenuUIControlSplice(unittest.TestCase):
+    def check(self, control: VertMenuUIControl) -> None:
+        fresh = VertMenuUIControl(control._items)
+        fresh._ensure_mappings()
+        self.assertEqual(control._offsets, fresh._offsets)
+        self.assertEqual(control._line_count, fresh._line_count)
+
+    def test_splice(self) -> None:
+        control = VertMenuUIControl([("a", 0), ("b", 1), ("c", 2), ("d", 3)])
+        control._ensure_mappings()
+        control.selected = 3
+        control.splice_items(1, 1, [("x\ny", 4), ("z", 5)])
+        self.check(control)
+        self.assertEqual(control.selected_item, ("d", 3))
+        control.splice_items(0, 3, [("w\nv\nu", 6)])
+        self.check(control)
+        self.assertEqual(control.selected_item, ("d", 3))
+        control.splice_items(1, 4, [])
+        self.check(control)
+        self.assertEqual(control.selected_item, ("w\nv\nu", 6))
+        self.assertEqual(control._line_count, 3)
+
+    def test_empty(self) -> None:
+        calls: List[Optional[int]] = []
+        control = VertMenuUIControl(
+            [], selected_handler=lambda item, index: calls.append(index)
+        )
+        control.splice_items(0, 0, [("a", 0)])
+        self.assertEqual(control.selected, 0)
+        control.splice_items(0, 1, [])
+        self.assertIsNone(control.selected)
+        self.assertEqual(calls, [0, None])
+
+
+class TestVertMenuUIControlMultiselect(unittest.TestCase):
+    def setUp(self) -> None:
+        self.items: List[Item] = [("a", 0), ("b\nc", 1), ("d", 2)]
+        self.control = VertMenuUIControl(self.items, multiselect=True)
+
+    def test_marks(self) -> None:
+        control = self.control
+        control.toggle_mark()
+        control.toggle_mark(2)
+        self.assertEqual(list(control.marked_items), [("a", 0), ("d", 2)])
+        control.invert_marks()
+        self.assertEqual(list(control.marked_items), [("b\nc", 1)])
+        control.mark_all()
+        self.assertEqual(len(control.marked_items), 3)
+        control.unmark_all()
+        self.assertEqual(len(control.marked_items), 0)
+
+    def test_render(self) -> None:
+        control = self.control
+        control.toggle_mark(1)
+        content = control.create_content(10, 10)
+        self.assertEqual(
+            content.get_line(0),
+            [
+                ("class:vertmenu.selected class:vertmenu.mark", "  "),
+                ("class:vertmenu.selected", "a"),
+            ],
+        )
+        self.assertEqual(content.get_line(1)[0][1], "● ")
+        self.assertEqual(content.get_line(2)[0][1], "  ")
+        self.assertEqual(control.preferred_width(99), 32)
+
+    def test_items_reset(self) -> None:
+        control = self.control
+        control.toggle_mark(0)
+        control.items = self.items
+        self.assertEqual(len(control.marked_items), 0)
+
+    def test_splice(self) -> None:
+        control = self.control
+        control.toggle_mark(2)
+        control.splice_items(0, 1, [("x", 3), ("y", 4)])
+        self.assertEqual(list(control.marked_items), [("d", 2)])
+        self.assertTrue(control.is_marked(3))
+
+
+class TestVertMenuUIControlDeferred(unittest.TestCase):
+    def test_first_render(self) -> None:
+        calls: List[Optional[int]] = []
+        control = VertMenuUIControl(
+            [("a", 0), ("b\nc", 1)],
+            selected_handler=lambda item, index: calls.append(index),
+        )
+        self.assertFalse(control._mapped)
+        self.assertEqual(calls, [])
+        content = control.create_content(10, 10)
+        self.assertEqual(content.line_count, 3)
+        self.assertEqual(calls, [0])
+        control.create_content(10, 10)
+        self.assertEqual(calls, [0])
+
+    def test_append(self) -> None:
+        control = VertMenuUIControl([("a", 0)])
+        control.append_items([("b\nc", 1)])
+        self.assertFalse(control._mapped)
+        self.assertEqual(control.preferred_height(10, 10, False, None), 3)
+
+
+class TestVertMenuUIControlAppend(unittest.TestCase):
+    def test_append(self) -> None:
+        control = VertMenuUIControl([])
+        self.assertEqual(control.selected, None)
+        control.append_items([("a", 0), ("b", 1)])
+        self.assertEqual(control.selected, 0)
+        self.assertIsNone(control._offsets)
+        control.selected = 1
+        control.append_items([("c\nd", 2), ("e", 3)])
+        self.assertEqual(control.selected, 1)
+        self.assertEqual(control.items, (("a", 0), ("b", 1), ("c\nd", 2), ("e", 3)))
+        self.assertEqual(control.preferred_height(999, 999, False, None), 5)
+        self.assertEqual([control._line_to_index(i) for i in range(5)], [0, 1, 2, 2, 3])
+
+    def test_pending(self) -> None:
+        control = VertMenuUIControl([])
+        control._pending_item = ("b", 1)
+        control.append_items([("a", 0)])
+        self.assertEqual(control.selected, 0)
+        control.append_items([("b", 1)])
+        self.assertEqual(control.selected, 1)
+        self.assertIsNone(control._pending_item)
+
+
+class TestVertMenuUIControlLineCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.items = [(f"item {i}", i) for i in range(10)]
+        self.control = VertMenuUIControl(self.items)
+        self.control.line_cache_size = 4
+
+    def test_bounded(self) -> None:
+        for i in range(10):
+            self.control._get_line(i)
+        self.assertEqual(list(self.control._line_cache), [6, 7, 8, 9])
+        self.control._get_line(7)
+        self.assertEqual(list(self.control._line_cache), [6, 8, 9, 7])
+
+    def test_selection(self) -> None:
+        self.control._get_line(0)
+        cached = self.control._line_cache[Index(0)]
+        self.control.selected = 1
+        self.assertEqual(self.control._get_line(0), [("class:vertmenu.item", "item 0")])
+        self.assertIs(self.control._line_cache[Index(0)], cached)
+
+    def test_items_reset(self) -> None:
+        self.control._get_line(0)
+        self.control.items = [("other", 0)]
+        self.assertEqual(
+            self.control._get_line(0), [("class:vertmenu.selected", "other")]
+        )
+
+
+class TestVertMenuUIControlItemIndex(unittest.TestCase):
+    def test_duplicates(self) -> None:
+        control = VertMenuUIControl([("a", 0), ("b", 1), ("a", 0)])
+        control.selected_item = ("a", 0)
+        self.assertEqual(control.selected, 0)
+
+    def test_unhashable(self) -> None:
+        items: List[Item] = [([("", "a")], 0), ("b", [1]), ("c", 2)]
+        control = VertMenuUIControl(items)
+        control.selected_item = items[1]
+        self.assertEqual(control.selected, 1)
+        control.selected_item = ("c", 2)
+        self.assertEqual(control.selected, 2)
+        with self.assertRaises(IndexError):
+            # Unhashable items are looked up by identity:
+            control.selected_item = ("b", [1])
+
+    def test_append(self) -> None:
+        control = VertMenuUIControl([("a", 0)])
+        control.selected_item = ("a", 0)
+        control.append_items([("b", 1)])
+        control.selected_item = ("b", 1)
+        self.assertEqual(control.selected, 1)
+
+    def test_set_items_hint(self) -> None:
+        calls: List[Optional[int]] = []
+        control = VertMenuUIControl(
+            [("a", 0), ("b", 1), ("c", 2)],
+            selected_handler=lambda item, index: calls.append(index),
+        )
+        control.create_content(10, 10)
+        control.selected = 2
+        control.set_items([("b", 1), ("c", 2)], 1)
+        self.assertEqual(control.selected_item, ("c", 2))
+        self.assertEqual(calls, [0, 2])
+        control.set_items([("b", 1)], 0)
+        self.assertEqual(calls, [0, 2, 0])
+
+
+class TestVertMenuUIControlWidth(unittest.TestCase):
+    def test_display_width(self) -> None:
+        label = "漢字" * 20
+        control = VertMenuUIControl([(label, 0), ("a\n" + label + "x", 1)])
+        self.assertEqual(control.preferred_width(999), 81)
+
+    def test_max_width(self) -> None:
+        control = VertMenuUIControl([("a" * 40, 0)], max_width=35)
+        self.assertEqual(control.preferred_width(999), 40)
+        # Once we get to max_width, labels are not measured anymore:
+        control.append_items([("a" * 50, 1)])
+        self.assertEqual(control.preferred_width(999), 40)
+        control.items = [("a" * 20, 0)]
+        self.assertEqual(control.preferred_width(999), 30)
+
+    def test_given_metrics(self) -> None:
+        control = VertMenuUIControl([])
+        control.set_items([("a\nb", 0), ("c", 1)], lines=[2, 1], widths=[50, 1])
+        self.assertEqual(control.preferred_width(999), 50)
+        self.assertEqual(control.preferred_height(999, 999, False, None), 3)
+
+
+class TestVertMenuUIControlHighlight(unittest.TestCase):
+    def test_highlight(self) -> None:
+        m = "class:vertmenu.match"
+        self.assertEqual(
+            highlight(
+                [("a", "abc"), ("[ZeroWidthEscape]", "x"), ("", "def")], [1, 2, 3, 5]
+            ),
+            [
+                ("a", "a"),
+                ("a " + m, "bc"),
+                ("[ZeroWidthEscape]", "x"),
+                (m, "d"),
+                ("", "e"),
+                (m, "f"),
+            ],
+        )
+        self.assertEqual(highlight([("", "abc")], []), [("", "abc")])
+
+    def test_highlighter(self) -> None:
+        requested: List[int] = []
+
+        def highlighter(index: int) -> List[int]:
+            requested.append(index)
+            return [0]
+
+        control = VertMenuUIControl([(f"i{i}\nx", i) for i in range(100)])
+        control.highlighter = highlighter
+        content = control.create_content(10, 4)
+        self.assertEqual(
+            content.get_line(2),
+            [
+                ("class:vertmenu.match class:vertmenu.item", "i"),
+                ("class:vertmenu.item", "1"),
+            ],
+        )
+        content.get_line(3)
+        self.assertEqual(requested, [1])
+
+
+class TestVertMenuUIControlHandlerDelay(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.items: List[Item] = [(f"item {i}", i) for i in range(10)]
+        self.calls: List[Tuple[Optional[Item], Optional[int]]] = []
+
+    def handler(self, item: Optional[Item], index: Optional[int]) -> None:
+        self.calls.append((item, index))
+
+    async def test_coalesce(self) -> None:
+        control = VertMenuUIControl(
+            self.items, selected_handler=self.handler, handler_delay=0.01
+        )
+        for _ in range(5):
+            control.go_relative(1)
+        self.assertEqual(self.calls, [])
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.calls, [(self.items[5], 5)])
+
+    async def test_cancel(self) -> None:
+        started: List[Optional[int]] = []
+        cancelled: List[Optional[int]] = []
+
+        async def handler(item: Optional[Item], index: Optional[int]) -> None:
+            started.append(index)
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(index)
+                raise
+
+        control = VertMenuUIControl(
+            self.items, selected_handler=handler, handler_delay=0
+        )
+        control.create_content(10, 10)
+        await asyncio.sleep(0.01)
+        control.go_relative(1)
+        await asyncio.sleep(0.01)
+        self.assertEqual(started, [0, 1])
+        self.assertEqual(cancelled, [0])
+
+    def test_pending(self) -> None:
+        # No event loop running in here:
+        control = VertMenuUIControl(
+            self.items, selected_handler=self.handler, handler_delay=0
+        )
+        self.assertTrue(control._handler_pending)
+
+        async def render() -> None:
+            control.create_content(10, 10)
+            await asyncio.sleep(0.01)
+
+        asyncio.run(render())
+        self.assertEqual(self.calls, [(self.items[0], 0)])
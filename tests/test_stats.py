@@ -0,0 +1,54 @@
+"""stats tests"""
+
+import unittest
+from typing import List, Tuple
+
+from ptvertmenu.dynvertmenu import FuzzRankVertMenu, RegexSearchVertMenu
+from ptvertmenu.stats import Stats
+from ptvertmenu.vertmenuuicontrol import VertMenuUIControl
+
+
+class TestStats(unittest.TestCase):
+    def test_record(self) -> None:
+        calls: List[Tuple[str, float]] = []
+        stats = Stats(lambda name, seconds: calls.append((name, seconds)))
+        stats.record("filter", 2.0)
+        stats.record("filter", 1.0)
+        self.assertEqual(stats.counts, {"filter": 2})
+        self.assertEqual(stats.total, {"filter": 3.0})
+        self.assertEqual(stats.last, {"filter": 1.0})
+        self.assertEqual(calls, [("filter", 2.0), ("filter", 1.0)])
+        with stats.measure("handler"):
+            pass
+        self.assertEqual(stats.counts["handler"], 1)
+        stats.reset()
+        self.assertEqual(stats.counts, {})
+
+    def test_control(self) -> None:
+        stats = Stats()
+        control = VertMenuUIControl(
+            [("a", 1), ("b\nc", 2)],
+            selected_handler=lambda item, index: None,
+            stats=stats,
+        )
+        # Everything waits for the first render:
+        self.assertEqual(stats.counts, {})
+        content = control.create_content(10, 10)
+        content.get_line(0)
+        content.get_line(2)
+        self.assertEqual(stats.counts["mappings"], 1)
+        self.assertEqual(stats.counts["handler"], 1)
+        self.assertEqual(stats.counts["create_content"], 1)
+        self.assertEqual(stats.counts["get_line"], 2)
+
+    def test_menus(self) -> None:
+        stats = Stats()
+        items = [("lunch", 1), ("dinner", 2)]
+        menu = FuzzRankVertMenu(items, limit=1, stats=stats)
+        menu.buffer.text = "d"
+        self.assertEqual(stats.counts["filter"], 1)
+        self.assertEqual(menu._vertmenu.control.stats, stats)
+        search = RegexSearchVertMenu(items, stats=stats)
+        search.buffer.text = "d"
+        search.search_next()
+        self.assertEqual(stats.counts["search"], 2)
@@ -0,0 +1,162 @@
+"""treevertmenu tests"""
+
+import asyncio
+import unittest
+from typing import Dict, List
+
+from prompt_toolkit.formatted_text import fragment_list_to_text
+
+from ptvertmenu.treevertmenu import TreeVertMenu, TreeVertMenuUIControl
+from ptvertmenu.vertmenu import Item
+from ptvertmenu.vertmenuuicontrol import VertMenuUIControl
+
+TREE: Dict[str, List[str]] = {
+    "a": ["a1", "a2"],
+    "a1": ["a1x", "a1y"],
+    "b": ["b1"],
+}
+
+
+def rows(control: VertMenuUIControl) -> List[str]:
+    return [item[1] for item in control._items]
+
+
+class TestTreeVertMenuUIControl(unittest.TestCase):
+    def setUp(self) -> None:
+        self.loaded: List[str] = []
+        self.control = TreeVertMenuUIControl(
+            [("a", "a"), ("b", "b"), ("c", "c")],
+            self.loader,
+            has_children=lambda item: item[1] in TREE,
+        )
+
+    def loader(self, item: Item) -> List[Item]:
+        self.loaded.append(item[1])
+        return [(name, name) for name in TREE[item[1]]]
+
+    def test_expand(self) -> None:
+        control = self.control
+        control.expand(0)
+        self.assertEqual(rows(control), ["a", "a1", "a2", "b", "c"])
+        self.assertEqual([control.depth(i) for i in range(5)], [0, 1, 1, 0, 0])
+        control.expand(1)
+        self.assertEqual(rows(control), ["a", "a1", "a1x", "a1y", "a2", "b", "c"])
+        self.assertEqual(control.parent(3), 1)
+        self.assertEqual(control.parent(1), 0)
+        self.assertIsNone(control.parent(0))
+        self.assertEqual(control.preferred_height(10, 10, False, None), 7)
+
+    def test_collapse(self) -> None:
+        control = self.control
+        control.expand(0)
+        control.expand(1)
+        control.selected = 3
+        control.collapse(0)
+        self.assertEqual(rows(control), ["a", "b", "c"])
+        self.assertEqual(control.selected, 0)
+        # The expanded descendants come back, without loading again:
+        control.expand(0)
+        self.assertEqual(rows(control), ["a", "a1", "a1x", "a1y", "a2", "b", "c"])
+        self.assertEqual(self.loaded, ["a", "a1"])
+
+    def test_selection_follows(self) -> None:
+        control = self.control
+        control.selected = 1
+        control.expand(0)
+        self.assertEqual(control.selected_item, ("b", "b"))
+        control.toggle(0)
+        self.assertEqual(control.selected_item, ("b", "b"))
+
+    def test_leaf(self) -> None:
+        self.control.expand(2)
+        self.assertEqual(rows(self.control), ["a", "b", "c"])
+        self.assertEqual(self.loaded, [])
+
+    def test_render(self) -> None:
+        control = self.control
+        control.expand(0)
+        content = control.create_content(20, 10)
+        self.assertEqual(
+            content.get_line(0),
+            [
+                ("class:vertmenu.marker class:vertmenu.selected", "▾ "),
+                ("class:vertmenu.selected", "a"),
+            ],
+        )
+        self.assertEqual(
+            content.get_line(1),
+            [
+                ("class:vertmenu.marker class:vertmenu.item", "  ▸ "),
+                ("class:vertmenu.item", "a1"),
+            ],
+        )
+        self.assertEqual(
+            content.get_line(4)[0], ("class:vertmenu.marker class:vertmenu.item", "  ")
+        )
+
+    def test_multiline(self) -> None:
+        control = TreeVertMenuUIControl(
+            [("a\nA", "a"), ("b", "b")],
+            lambda item: [("x\ny\nz", "x"), ("w", "w")],
+        )
+        control.create_content(20, 10)
+        control.expand(0)
+        self.assertEqual(control.preferred_height(20, 10, False, None), 7)
+        self.assertEqual(control._line_to_index(5), 2)
+        self.assertEqual(control._line_to_index(6), 3)
+        content = control.create_content(20, 10)
+        self.assertEqual(
+            [fragment_list_to_text(content.get_line(i)) for i in range(4)],
+            ["▾ a", "  A", "  ▸ x", "    y"],
+        )
+        control.collapse(0)
+        self.assertEqual(control.preferred_height(20, 10, False, None), 3)
+        self.assertEqual(control._line_to_index(2), 1)
+
+
+class TestTreeVertMenuUIControlAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_async_loader(self) -> None:
+        release = asyncio.Event()
+
+        async def loader(item: Item) -> List[Item]:
+            await release.wait()
+            return [(name, name) for name in TREE[item[1]]]
+
+        control = TreeVertMenuUIControl([("a", "a"), ("b", "b")], loader)
+        control.expand(1)
+        control.expand(0)
+        self.assertTrue(control.is_expanded(0))
+        self.assertEqual(rows(control), ["a", "b"])
+        release.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual(rows(control), ["a", "a1", "a2", "b", "b1"])
+
+    async def test_collapse_cancels(self) -> None:
+        async def loader(item: Item) -> List[Item]:
+            await asyncio.sleep(1)
+            return []
+
+        control = TreeVertMenuUIControl([("a", "a")], loader)
+        control.expand(0)
+        task = control._loading["a"]
+        control.collapse(0)
+        await asyncio.sleep(0)
+        self.assertTrue(task.cancelled())
+        self.assertFalse(control.is_expanded(0))
+
+
+class TestTreeVertMenu(unittest.TestCase):
+    def test_collapse_or_parent(self) -> None:
+        menu = TreeVertMenu(
+            [("a", "a"), ("b", "b")],
+            lambda item: [(name, name) for name in TREE.get(item[1], [])],
+        )
+        menu.control.expand(0)
+        menu.selected = 2
+        menu.collapse_or_parent()
+        self.assertEqual(menu.selected, 0)
+        menu.collapse_or_parent()
+        self.assertEqual(rows(menu.control), ["a", "b"])
+        menu.items = [("c", "c")]
+        self.assertEqual(rows(menu.control), ["c"])
+        self.assertEqual(menu.control.depth(0), 0)
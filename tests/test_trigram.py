@@ -0,0 +1,83 @@
+"""trigram tests"""
+
+import re
+import unittest
+from typing import List
+
+from ptvertmenu.dynvertmenu import RegexFilterVertMenu
+from ptvertmenu.trigram import TrigramIndex, required_literals
+from ptvertmenu.vertmenu import Item
+
+LABELS = [
+    "breakfast",
+    "lunch",
+    "dinner",
+    "midnight snack",
+    "brunch",
+    "late dinner",
+]
+
+
+class TestRequiredLiterals(unittest.TestCase):
+    def test_literals(self) -> None:
+        self.assertEqual(required_literals("lunch"), ["lunch"])
+        self.assertEqual(required_literals("^br.nch$"), ["br", "nch"])
+        self.assertEqual(required_literals("a(bc)d"), ["abcd"])
+        self.assertEqual(required_literals("ab(cd)+e"), ["ab", "cd", "e"])
+        self.assertEqual(required_literals("ab(cd)*e"), ["ab", "e"])
+        self.assertEqual(required_literals("[x]yz"), ["xyz"])
+
+    def test_nothing_required(self) -> None:
+        self.assertEqual(required_literals("lunch|dinner"), [])
+        self.assertEqual(required_literals(".*"), [])
+
+    def test_unusable(self) -> None:
+        self.assertIsNone(required_literals("(?i)lunch"))
+        self.assertIsNone(required_literals("lun("))
+        self.assertEqual(required_literals("ab(?i:cd)ef"), ["ab", "ef"])
+
+
+class TestTrigramIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = TrigramIndex(LABELS)
+
+    def test_candidates(self) -> None:
+        self.assertEqual(self.index.candidates("unch"), [1, 4])
+        self.assertEqual(self.index.candidates("d.nner"), [2, 5])
+        self.assertEqual(self.index.candidates("zzz"), [])
+        self.assertIsNone(self.index.candidates("d.n"))
+        self.assertIsNone(self.index.candidates("lunch|dinner"))
+
+    def test_superset(self) -> None:
+        for query in ["unch", "d.nner", "^bre", "a+k", "n(er)?$", "st sn"]:
+            candidates = self.index.candidates(query)
+            if candidates is None:
+                continue
+            matches = [i for i, label in enumerate(LABELS) if re.search(query, label)]
+            self.assertLessEqual(set(matches), set(candidates), query)
+
+    def test_extend(self) -> None:
+        labels = LABELS + ["second lunch"]
+        self.index.extend(labels, len(LABELS))
+        self.assertEqual(self.index.candidates("lunch"), [1, 6])
+
+
+class TestRegexFilterTrigram(unittest.TestCase):
+    def make_menu(self, trigram_index: bool) -> RegexFilterVertMenu:
+        items: List[Item] = [(label, i) for i, label in enumerate(LABELS)]
+        return RegexFilterVertMenu(items, trigram_index=trigram_index)
+
+    def test_same_matches(self) -> None:
+        plain = self.make_menu(False)
+        indexed = self.make_menu(True)
+        self.assertIsNone(plain._trigrams)
+        for text in ["d", "di", "din", "dinn", "d", "", "unch|er$", "b.*ch"]:
+            plain.buffer.text = text
+            indexed.buffer.text = text
+            self.assertEqual(list(indexed.shown_items), list(plain.shown_items), text)
+
+    def test_items(self) -> None:
+        menu = self.make_menu(True)
+        menu.items = [("lunch box", 0)]
+        menu.buffer.text = "box"
+        self.assertEqual(list(menu.shown_items), [("lunch box", 0)])